@@ -13,6 +13,8 @@
 # ## Imports
 from analysis import analysis_inside
 from analysis import analysis_outside
+import preprocessing
+from services import manage_dfs
 import logging
 
 # ## Define Variables
@@ -21,7 +23,7 @@ dict_traindata = dict()
 
 # ## Functions
 # ----- Analysis_inside -----
-def analysis_in(args: dict, dict_testdata :dict, dict_traindata: dict) -> None:
+def analysis_in(args: dict, dict_testdata :dict, dict_traindata: dict, dict_combined: dict = None) -> None:
     """ analysis_inside (searches for duplicates in one dataset)
             * preprocessing
             * pairing
@@ -35,7 +37,9 @@ def analysis_in(args: dict, dict_testdata :dict, dict_traindata: dict) -> None:
     dict_testdata : dict
         Dictionary with testdata -> keys: table_names, values: DataFrames with job-ads
     dict_traindata: dict
-        Dictionary with trainingdata -> keys: table_names, values: DataFrames with job-ads """ 
+        Dictionary with trainingdata -> keys: table_names, values: DataFrames with job-ads
+    dict_combined: dict
+        Optional: tables of the combined preprocessing of dict_testdata (see combined_testdata), used instead of tokenizing the testdata again """ 
     
     # Get values from ArgumentParser
     method_args = vars(args)
@@ -45,7 +49,7 @@ def analysis_in(args: dict, dict_testdata :dict, dict_traindata: dict) -> None:
     if method_args["preprocessing"]:
         step_key = 'preprocessing'
         logging.info("Preprocessing for the data starts.")
-        dict_testdata = analysis_inside.step_preprocessing(dict_testdata, step_key)
+        dict_testdata = analysis_inside.step_preprocessing(dict_testdata, step_key, dict_combined)
         logging.info("Preprocessing finished.")
     # Pairing
     if method_args['pairing']:
@@ -66,7 +70,7 @@ def analysis_in(args: dict, dict_testdata :dict, dict_traindata: dict) -> None:
         # Preprocessing
         step_key = 'preprocessing'
         logging.info("Preprocessing for the data starts.")
-        dict_testdata = analysis_inside.step_preprocessing(dict_testdata, step_key)
+        dict_testdata = analysis_inside.step_preprocessing(dict_testdata, step_key, dict_combined)
         logging.info("Preprocessing finished.")
         # Pairing
         logging.info('Pairing starts.')
@@ -82,7 +86,7 @@ def analysis_in(args: dict, dict_testdata :dict, dict_traindata: dict) -> None:
         logging.info('Evaluation finished.')
 
 # ----- Analysis_outside -----
-def analysis_out(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
+def analysis_out(args: dict, dict_testdata: dict, dict_traindata: dict, dict_combined: dict = None) -> None:
     """ analysis_outside (searches for duplicates for the testdata in the traindata).
         Options:
             * doc2vec
@@ -95,7 +99,9 @@ def analysis_out(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
     dict_testdata : dict
         Dictionary with testdata -> keys: table_names, values: DataFrames with job-ads
     dict_traindata: dict
-        Dictionary with trainingdata -> keys: table_names, values: DataFrames with job-ads """
+        Dictionary with trainingdata -> keys: table_names, values: DataFrames with job-ads
+    dict_combined: dict
+        Optional: tables of the combined preprocessing of dict_testdata (see combined_testdata), used instead of tokenizing the testdata again """
 
     # Get values from ArgumentParser
     method_args = vars(args)
@@ -104,7 +110,7 @@ def analysis_out(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
     # Doc2Vec
     if method_args['method_out'] == 'doc2vec':
         logging.info('Method Doc2Vec starts.')
-        analysis_outside.doc2vec_out(args, dict_testdata, dict_traindata)
+        analysis_outside.doc2vec_out(args, dict_testdata, dict_traindata, dict_combined)
         logging.info('Method Doc2Vec finished.')
     # TF-IDF
     elif method_args['method_out'] == 'tfidf':
@@ -113,5 +119,32 @@ def analysis_out(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
         logging.info('Method TF-IDF finished.')
     else:
         logging.info('Method Doc2Vec starts.')
-        analysis_outside.doc2vec_out(args, dict_testdata, dict_traindata)
-        logging.info('Method Doc2Vec finished.')
\ No newline at end of file
+        analysis_outside.doc2vec_out(args, dict_testdata, dict_traindata, dict_combined)
+        logging.info('Method Doc2Vec finished.')
+# ----- Combined Preprocessing -----
+def combined_testdata(args: dict, dict_testdata: dict) -> dict:
+    """ Tokenizes the testdata once for analysis_inside (OneStrings) and analysis_outside with Doc2Vec (TaggedDocuments).
+    Only if both preprocess the loaded testdata in this run (complete analysis, method_out doc2vec, no streaming) and combined: true (config.yaml: preprocessing).
+    The caller keeps the returned tables until both analysis steps are done.
+
+    Parameters
+    ----------
+    args : dict
+        The ArgumentParser values to manage which part(s) of the program need(s) to be addressed
+    dict_testdata : dict
+        Dictionary with testdata -> keys: table_names, values: DataFrames with job-ads
+
+    Returns
+    -------
+    dict_combined: dict
+        Dictionary with the combined preprocessing -> keys: table_names, values: preprocessing_data.PreprocessedTable (empty if not needed) """
+
+    method_args = vars(args)
+    steps = ('preprocessing', 'pairing', 'calculation', 'evaluation', 'mostsim')
+    # both steps preprocess the testdata with --preprocessing or if no step is chosen
+    both_preprocess = method_args['preprocessing'] == True or not any(method_args[step] for step in steps)
+    loaded = bool(dict_testdata) and all({'unique_id', 'full_text'} <= set(df.columns) for df in dict_testdata.values())
+    if method_args['method_out'] != 'doc2vec' or not both_preprocess or not loaded or manage_dfs.stream_chunks:
+        return dict()
+    logging.info('Testdata is tokenized once for analysis_inside and analysis_outside.')
+    return preprocessing.preprocess_combined_tables(dict_testdata)
@@ -33,7 +33,7 @@ import sys
 # ## Functions
 
 # ----- Preprocessing -----
-def step_preprocessing(dict_testdata: dict, step_key: str) -> dict:
+def step_preprocessing(dict_testdata: dict, step_key: str, dict_combined: dict = None) -> dict:
     """* preprocessing
             1. Load data if not already loaded 
             2. Pass data to preprocessing and manage returned data
@@ -45,6 +45,8 @@ def step_preprocessing(dict_testdata: dict, step_key: str) -> dict:
         Dictionary with testdata -> keys: table_names, values: DataFrames with job-ads  
     step_key: str
         String with the step_key to define which parts of the program need to be used
+    dict_combined: dict
+        Optional: tables of the combined preprocessing of dict_testdata (keys: table_names), used instead of tokenizing the tables again
     
     Raises
     ------
@@ -69,20 +71,24 @@ def step_preprocessing(dict_testdata: dict, step_key: str) -> dict:
         logging.info('Input-Data needs to be loaded first.')
         # Build connection Input
         conn = connection_preparation.conn_testing()
+        # Streaming: preprocess the data chunkwise, the pairing step reloads the preprocessed data from /temp
+        if manage_dfs.stream_chunks:
+            __prepro_stream_support(conn, step_key)
+            return dict_testdata_prepro
         # Read dataframe
         dict_testdata = manage_dfs.get_df(conn)
     else:
         pass
     # Call the support function to actually do the preprocessing and return the preprocessed data
-    dict_testdata_prepro = __prepro_support(dict_testdata, step_key, dict_testdata_prepro)
+    dict_testdata_prepro = __prepro_support(dict_testdata, step_key, dict_testdata_prepro, dict_combined)
     return dict_testdata_prepro
 
-def __prepro_support(dict_testdata: dict, step_key: str, dict_testdata_prepro: dict) -> dict:
+def __prepro_support(dict_testdata: dict, step_key: str, dict_testdata_prepro: dict, dict_combined: dict = None) -> dict:
     # create temp file and make connection
     conn_temp = connection_preparation.create_prepro_connection()
     for name, df_table in dict_testdata.items():
         # preprocess data
-        onestring_dict = preprocessing.preprocess_data(df_table, step_key)
+        onestring_dict = preprocessing.preprocess_data(df_table, step_key, (dict_combined or dict()).get(name))
         # add results in dataframe
         df_preprocessed = manage_dfs.add_converted_data_to_frame(df_table, onestring_dict, step_key)
         # store df_edited in temp for evaluation
@@ -90,6 +96,17 @@ def __prepro_support(dict_testdata: dict, step_key: str, dict_testdata_prepro: d
         dict_testdata_prepro[name] = df_preprocessed
     return dict_testdata_prepro
 
+def __prepro_stream_support(conn, step_key: str) -> None:
+    # create temp file and make connection
+    conn_temp = connection_preparation.create_prepro_connection()
+    written_tables = set()
+    for name, df_chunk, onestring_dict in preprocessing.preprocess_chunks(manage_dfs.iter_chunks(conn), step_key):
+        # add results in chunk
+        df_preprocessed = manage_dfs.add_converted_data_to_frame(df_chunk, onestring_dict, step_key)
+        # append chunk to temp
+        manage_dfs.write_chunk_output(conn_temp, name, df_preprocessed, name not in written_tables)
+        written_tables.add(name)
+
 # ----- Pairing -----
 def step_pairing(dict_testdata_prepro: dict) -> dict:
     """* pairing
@@ -213,9 +230,9 @@ def __calc_support(dict_testdata_pairs: dict, step_key: str, jaccard: bool, dict
     conn_temp = connection_preparation.create_temp_connection()
     for key, df_preprocessed in dict_testdata_pairs.items():
         # calculate distances depending on chosen method from step_key (levenshtein, countvec_sim, tfidf, doc2vec or shingling)
-        result_dict = calculate_ratios.calc(df_preprocessed, step_key, jaccard)
-        # add results in dataframe
-        df_result = manage_dfs.add_converted_data_to_frame(df_preprocessed, result_dict, step_key)
+        scores = calculate_ratios.calc(df_preprocessed, step_key, jaccard)
+        # add results in dataframe (by position)
+        df_result = manage_dfs.add_scores_to_frame(df_preprocessed, scores, step_key)
         # store df_edited in temp for evaluation
         manage_dfs.write_df_output(conn_temp, key, df_result)
         dict_testdata_calc[key] = df_result
@@ -1,14 +1,17 @@
 # *** Calculator ***
-"""Script manages the data handling to get pairwise strings and pass them to chosen method. 
-In Return the score per pair is delivered and noted in result_dict."""
+"""Script manages the data handling to get pairwise strings and pass them to chosen method.
+All pairs of a table are passed at once: the distinct documents (one per unique_id) and two index arrays for the pairs (a & b).
+In Return the scores of all pairs are delivered and noted per row (both rows of a pair get the same score)."""
 
 # ## Imports
 from . import formulas
+from preprocessing import encoding
 import pandas as pd
+import numpy as np
 import logging
 
-def calc(df: pd.DataFrame, step_key: str, jaccard: bool) -> dict:
-    """Function iterates over dataframe and extracts each pair to be analyzed.
+def calc(df: pd.DataFrame, step_key: str, jaccard: bool) -> np.ndarray:
+    """Function extracts all pairs to be analyzed from the dataframe and passes them to the chosen method at once.
 
     Parameters
     ----------
@@ -21,32 +24,36 @@ def calc(df: pd.DataFrame, step_key: str, jaccard: bool) -> dict:
 
     Returns
     -------
-    result: dict
-        Dictionary with calculated testdata -> keys: pairing_labels & values: scores """
-
-    # Set Output Dictionary
-    result_dict = dict()
-    # Iterate over DataFrame two rows at a time via index
-    for (indx1),(indx2) in zip(df[:-1].index,df[1:].index):
-        # Select pairs (a & b)
-        if df.loc[indx1].pairing_label.endswith('a') and df.loc[indx2].pairing_label.endswith('b'):
-            # save the label and the fulltext depending on pairing (a or b)
-            patterna = df.loc[indx1].pairing_label
-            patternb = df.loc[indx2].pairing_label
-            try:
-                # Select preprocessed full_texts 
-                input_full_a = df.loc[indx1].OneString
-                input_full_b = df.loc[indx2].OneString
-            except:
-                logging.info('For a pair in Calculation, no full_texts could be extracted. Scores will remain empty.')
-                result_dict.update({patterna : ''})     
-                result_dict.update({patternb : ''})
-                pass
-            # CALCULATOR
-            cosine = formulas.distributor(step_key, input_full_a, input_full_b, jaccard)
-            # update dict with cosine for each label
-            result_dict.update({patterna : cosine})     
-            result_dict.update({patternb : cosine})
-        else:
-            continue
-    return result_dict
\ No newline at end of file
+    scores: np.ndarray
+        Array with one score per row of df (same order). Rows without a complete pair (a & b) get NaN. """
+
+    # Set Output Array
+    scores = np.full(len(df), np.nan)
+    # Select pairs (a & b): a row with label a followed by a row with label b
+    labels = df['pairing_label'].astype(str)
+    is_a = labels.str.endswith('a').to_numpy()
+    is_b = labels.str.endswith('b').to_numpy()
+    rows_a = np.flatnonzero(is_a[:-1] & is_b[1:])
+    rows_b = rows_a + 1
+    if len(rows_a) == 0:
+        logging.info('No pairs were found for the calculation. Scores will remain empty.')
+        return scores
+
+    # Each document (unique_id) is passed only once, the pairs are given as positions in the list of documents
+    unique_ids = df['unique_id'].to_numpy()
+    onestrings = df['OneString'].fillna('').astype(str).to_numpy()
+    codes, _ = pd.factorize(np.concatenate((unique_ids[rows_a], unique_ids[rows_b])))
+    idx_a, idx_b = codes[:len(rows_a)], codes[len(rows_a):]
+    _, first_rows = np.unique(codes, return_index=True)
+    docs = list(np.concatenate((onestrings[rows_a], onestrings[rows_b]))[first_rows])
+    logging.info(f'{len(rows_a)} pairs with {len(docs)} distinct documents are passed to method {step_key}.')
+
+    # Encode the documents once (token ids) for the methods which count tokens
+    encoded = encoding.encode_texts(docs) if step_key in ('countvec', 'tfidf', 'shingling') else None
+
+    # CALCULATOR
+    pair_scores = formulas.distributor_batch(step_key, docs, encoded, idx_a, idx_b, jaccard)
+    # note the score for both rows of each pair
+    scores[rows_a] = pair_scores
+    scores[rows_b] = pair_scores
+    return scores
@@ -37,6 +37,8 @@ class Threshold:
         self.df = df
         self.threshold = None
         self.threshold_source = None
+        self.mean = None
+        self.std = None
 
     # getter method for thresholds depending on source_url
     def get_threshold_source(self): 
@@ -48,41 +50,46 @@ class Threshold:
 
     # setter method for thresholds depending on source_url 
     def set_threshold_source(self):
-        df = self.df
-        step_key = self.name
+        mean, std = self.__mean_std()
         if self.name == "countvec":
-            threshold = (df[step_key].mean() + df[step_key].std()+ df[step_key].std()+ df[step_key].std())  
+            threshold = (mean + std + std + std)
         elif self.name =="doc2vec":
-            threshold = (df[step_key].mean()+ df[step_key].std()+ df[step_key].std()/2)
+            threshold = (mean + std + std/2)
         elif self.name == "levenshtein":
-            threshold = (df[step_key].mean() + df[step_key].std()+ df[step_key].std())
+            threshold = (mean + std + std)
         elif self.name == "tfidf":
-            threshold = (df[step_key].mean() + df[step_key].std()+ df[step_key].std()+ df[step_key].std())
+            threshold = (mean + std + std + std)
         elif self.name == "shingling":
-            threshold = (df[step_key].mean() + df[step_key].std()+ df[step_key].std()+ df[step_key].std())
+            threshold = (mean + std + std + std)
         self.threshold_source = threshold
 
     # setter method for threshold
     def set_threshold(self):
-        df = self.df
-        step_key = self.name
+        mean, std = self.__mean_std()
         if self.name == "countvec":
-            threshold = (df[step_key].mean())     
+            threshold = (mean)
         elif self.name == "doc2vec":
-            threshold = (df[step_key].mean()+ df[step_key].std())
+            threshold = (mean + std)
         elif self.name == "levenshtein":
-            threshold = (df[step_key].mean()+ df[step_key].std()) 
+            threshold = (mean + std)
         elif self.name == "tfidf":
-            threshold = (df[step_key].mean()+ df[step_key].std()/2)
+            threshold = (mean + std/2)
         elif self.name == "shingling":
-            threshold = (df[step_key].mean())
+            threshold = (mean)
         self.threshold = threshold
 
+    # mean and standard derivation of the scores (only computed once)
+    def __mean_std(self):
+        if self.mean is None:
+            self.mean = self.df[self.name].mean()
+            self.std = self.df[self.name].std()
+        return self.mean, self.std
+
 
 # ## Functions
 def starter(df: pd.DataFrame, step_key: str) -> pd.DataFrame:
 
-    """Function iterates over dataframe and evaluates the final data. Returns a df with the chosen duplicate pairs.
+    """Function evaluates the final data of the dataframe (all pairs at once). Returns a df with the chosen duplicate pairs.
 
     Parameters
     ----------
@@ -101,47 +108,32 @@ def starter(df: pd.DataFrame, step_key: str) -> pd.DataFrame:
     df_pairs: pd.Dataframe
         Dataframe with the Output-duplicates (pairwise). """
 
-    # Set Output DataFrame to store found duplicate-pairs
-    df_pairs = pd.DataFrame()
-
     # Initiate Threshold-object to set different values depending on metadata "source_url"
     thres_obj = Threshold(step_key, df)
     thres_obj.set_threshold_source()
     thres_obj.set_threshold()
 
-    # Set scores-list
-    scores = list()
-
     # A. SET Measurements
     # --------------------
-    """ Iterate over df, check if a pair has the same source_website and set threshold (higher for same urls and lower for differnt urls) """
-    for ind in df.index:
-        if ind%2 == False:
-            if df['source_website'][ind] == df['source_website'][ind+1]:
-                # get higher threshold
-                threshold = thres_obj.get_threshold_source()
-            else:
-                # get lower threshold
-                threshold = thres_obj.get_threshold()
-        else: 
-            pass
-
-        """# If you want to use generalized threshold for all methods and not a source related one, use the following line.
-        threshold = (df[step_key].mean()+ df[step_key].std())"""
-
-        # B. CLASSIFY the data
-        # --------------------
-        """ Check if a job-ad has a score over or under the threshold and store the positives in df_pairs."""
-        if np.count_nonzero(float(df[step_key][ind]) >= threshold):
-            scores.append(1)
-            """ The following line is commented out because it is only needed for masterthesis.
-            df.at[ind, 'Shingling_duplicate'] = 1"""
-            df_pairs = df_pairs.append(df.iloc[ind], ignore_index=True)
-        else:
-            scores.append(0)
-            # following line commented out only for masterthesis needed
-            """ df.at[ind, 'Shingling_duplicate'] = 0
-            df_pairs = df_pairs.append(df.iloc[ind], ignore_index=True) """
+    """ Check for each pair (rows 2k & 2k+1) if both job-ads have the same source_website and set threshold (higher for same urls and lower for differnt urls).
+        Both rows of a pair get the threshold of the pair. A row without partner gets the lower threshold. """
+    source = df['source_website'].to_numpy()
+    same_source = np.zeros(len(df), dtype=bool)
+    same_source[0:len(df) - 1:2] = source[0:len(df) - 1:2] == source[1::2]
+    same_source[1::2] = same_source[0:len(df) - 1:2]
+    thresholds = np.where(same_source, thres_obj.get_threshold_source(), thres_obj.get_threshold())
+
+    """# If you want to use generalized threshold for all methods and not a source related one, use the following line.
+    thresholds = np.full(len(df), df[step_key].mean()+ df[step_key].std())"""
+
+    # B. CLASSIFY the data
+    # --------------------
+    """ Check if a job-ad has a score over or under the threshold and store the positives in df_pairs."""
+    duplicate = df[step_key].astype(float).to_numpy() >= thresholds
+    scores = duplicate.astype(int).tolist()
+    """ The following line is commented out because it is only needed for masterthesis.
+    df['Shingling_duplicate'] = scores"""
+    df_pairs = df.loc[duplicate].reset_index(drop=True)
 
     # C. EVALUATE data
     # -----------------
@@ -5,7 +5,8 @@
         b. Levenshtein_Distance
         c. Tfidf_Similarity
         d. Doc2Vec_Similarity
-        e. Shingling_Similarity """
+        e. Shingling_Similarity 
+    distributor() scores one pair, distributor_batch() scores all pairs of a table at once. """
 
 # ## Imports
 from . import formula_countveccosine
@@ -13,6 +14,8 @@ from . import formula_doc2veccosine
 from . import formula_levenshtein
 from . import formula_tfidfcosine
 from . import formula_shinglingcosine
+from preprocessing import encoding
+import numpy as np
 
 # ## Set Variables
 sim_score = None
@@ -50,4 +53,39 @@ def distributor (step_key: str, input_full_a: str, input_full_b: str, jaccard: b
     elif step_key == 'shingling':
         sim_score = formula_shinglingcosine.calculate_shinglingcosine(input_full_a, input_full_b, jaccard)
 
-    return sim_score
\ No newline at end of file
+    return sim_score
+
+def distributor_batch(step_key: str, docs: list, encoded: encoding.EncodedDocs, idx_a: np.ndarray, idx_b: np.ndarray, jaccard: bool) -> np.ndarray:
+    """ Uses step_key to choose method for calculating the similarity of all pairs of a table at once.
+    Parameters
+    ----------
+    step_key: str
+        String with the step_key to define which parts of the program need to be used.
+    docs: list
+        List with the distinct preprocessed full_texts (OneStrings) of the table (one per unique_id)
+    encoded: encoding.EncodedDocs
+        Token ids of the texts in docs (None for levenshtein and doc2vec, they use the strings)
+    idx_a: np.ndarray
+        Positions in docs of the first job-ad of each pair
+    idx_b: np.ndarray
+        Positions in docs of the second job-ad of each pair
+    jaccard: bool
+        Boolean from ArgumentParser to decide if inside method Shingling_Similarity the jaccard- or cosine - similarity needs to be calculated.
+
+    Returns
+    -------
+    sim_scores: np.ndarray
+        One sim_score between 0 and 1 per pair. Describes similarity between the processed strings."""
+
+    if step_key == 'countvec':
+        sim_scores = formula_countveccosine.calculate_countveccosine_batch(encoded, idx_a, idx_b)
+    elif step_key == 'levenshtein':
+        sim_scores = formula_levenshtein.calculate_levenshtein_batch(docs, idx_a, idx_b)
+    elif step_key == 'tfidf':
+        sim_scores = formula_tfidfcosine.calculate_tfidfcosine_batch(docs, encoded, idx_a, idx_b)
+    elif step_key == 'doc2vec':
+        sim_scores = formula_doc2veccosine.calculate_doc2veccosine_batch(docs, idx_a, idx_b)
+    elif step_key == 'shingling':
+        sim_scores = formula_shinglingcosine.calculate_shinglingcosine_batch(encoded, idx_a, idx_b, jaccard)
+
+    return sim_scores
@@ -2,8 +2,12 @@
 """ Script receives two strings and calculates the similarity with the method CountVectorizer and computes the Cosine-Similarity """
 
 # ## Imports
+import numpy as np
 from sklearn.feature_extraction.text import CountVectorizer 
 from sklearn.metrics.pairwise import cosine_similarity
+from . import sparse_cosine
+from preprocessing import encoding
+import logging
 
 def calculate_countveccosine(input_full_a: str, input_full_b: str) -> float:
     """ Transform two strings in vectors with the CountVectorizer() and compute cosine-similarity.
@@ -27,4 +31,34 @@ def calculate_countveccosine(input_full_a: str, input_full_b: str) -> float:
     # calculate cosine for the vectors
     cosine = cosine_similarity(vectors[0], vectors[1])[0][0]
     # return cosine score
-    return cosine
\ No newline at end of file
+    return cosine
+
+def calculate_countveccosine_batch(encoded: encoding.EncodedDocs, idx_a: np.ndarray, idx_b: np.ndarray) -> np.ndarray:
+    """ Compute the count vectors of all pairs from the encoded texts (token ids) and compute cosine-similarity.
+    Each distinct text is counted once, the columns are the token ids of the table (preprocessing.encoding).
+    The counts of a text do not depend on the other texts in the vocabulary, so the scores are the same as with one
+    CountVectorizer() per pair (the preprocessed tokens are word characters with at least two characters, like the token_pattern).
+
+    Parameters
+    ----------
+    encoded: encoding.EncodedDocs
+        Token ids of the distinct preprocessed full_texts (OneStrings) of one table
+    idx_a: np.ndarray
+        Positions in docs of the first job-ad of each pair
+    idx_b: np.ndarray
+        Positions in docs of the second job-ad of each pair
+
+    Returns
+    -------
+    cosines: np.ndarray
+        One cosine per pair, a sim_score between 0 and 1. Describes similarity between the processed strings."""
+
+    # count the token ids (once per table)
+    vectors = encoded.counts()
+    if vectors.nnz == 0:
+        # no text of the table contains a token
+        logging.warning('CountVectorizer found no vocabulary in the passed texts. All cosines are set to 0.')
+        return np.zeros(len(idx_a), dtype=np.float64)
+    # calculate cosine for all pairs via row-wise dot product
+    cosines = sparse_cosine.pair_cosines(vectors, idx_a, idx_b)
+    return cosines
@@ -14,7 +14,10 @@
     --> Check that model "dv2_remodel" is envoked by function __envoke_model() """
 
 # ## Imports
-from modeling import doc2vec
+import numpy as np
+from modeling import registry
+from modeling.doc2vec import infer
+from services import vector_ops
 from sklearn.metrics.pairwise import cosine_similarity
 import yaml
 from pathlib import Path
@@ -84,9 +87,35 @@ def calculate_doc2veccosine(input_full_a: str, input_full_b: str) -> float:
     # return similarity_score for processed pair of strings
     return cosine
     
+
+def calculate_doc2veccosine_batch(docs: list, idx_a: np.ndarray, idx_b: np.ndarray) -> np.ndarray:
+    """ Transform the strings of all pairs in vectors with the Doc2Vec-model and compute cosine-similarity.
+    Like Method 1 (similarity_unseen_docs), but each distinct text is inferred only once and all cosines are computed at once.
+
+    Parameters
+    ----------
+    docs: list
+        List with the distinct preprocessed full_texts (OneStrings) of one table
+    idx_a: np.ndarray
+        Positions in docs of the first job-ad of each pair
+    idx_b: np.ndarray
+        Positions in docs of the second job-ad of each pair
+
+    Returns
+    -------
+    cosines: np.ndarray
+        One cosine per pair, a sim_score between 0 and 1. Describes similarity between the processed strings."""
+
+    # Infer each distinct text only once (in parallel, see config.yaml doc2vec_model: infer_workers)
+    vectors = infer.infer_vectors(d2v_type, [doc.split() for doc in docs], texts=docs)
+    # Normalize vectors once, the cosine is then the dot product of the two vectors (same as similarity_unseen_docs)
+    vectors = vector_ops.normalize_rows(vectors)
+    cosines = vector_ops.pairwise_rows(vectors, idx_a, idx_b, lambda rows_a, rows_b: np.einsum('ij,ij->i', rows_a, rows_b))
+    return cosines
+
 def __envoke_model(): 
     global d2v_model
     if d2v_model is None:
         # decide which one to use (d2v_model or d2v_remodel) depends on function (in config)
-        d2v_model = doc2vec.load_model(d2v_type)
+        d2v_model = registry.get(d2v_type)
     return d2v_model
\ No newline at end of file
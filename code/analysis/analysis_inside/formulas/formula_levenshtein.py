@@ -1,8 +1,30 @@
 # *** Levenshtein-Ratio ***
-"""Script receives two strings and computes Levenshtein-Ratio"""
+"""Script receives two strings and computes Levenshtein-Ratio.
+For all pairs of a table (calculate_levenshtein_batch) the ratios are computed by several worker processes.
+Pairs whose text lengths alone prove that they can not reach the cutoff (config.yaml) are skipped and get 0."""
 
 # ## Imports
+import numpy as np
 import Levenshtein as lev
+from multiprocessing import Pool
+import yaml
+from pathlib import Path
+import logging
+
+# ## Set Variables
+worker_docs = list()
+worker_idx_a = None
+worker_idx_b = None
+
+# ## Open Configuration-file and set workers and cutoff
+with open(Path("config.yaml"), "r") as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    lev_params = cfg['calculation']['levenshtein']
+    workers = lev_params['workers']
+    cutoff = lev_params['cutoff']
+
+# Number of pairs per task passed to a worker
+CHUNK_SIZE = 2000
 
 # ## Function
 def calculate_levenshtein(input_full_a: str, input_full_b: str) -> float:
@@ -23,4 +45,54 @@ def calculate_levenshtein(input_full_a: str, input_full_b: str) -> float:
     # Compute similarity between two strings
     ratio = lev.ratio(input_full_a,input_full_b)
     # Return ratio
-    return ratio
\ No newline at end of file
+    return ratio
+
+def calculate_levenshtein_batch(docs: list, idx_a: np.ndarray, idx_b: np.ndarray) -> np.ndarray:
+    """ Compute Levenshtein-Ratio for all pairs of a table.
+    Pairs with a length-bound under the cutoff get 0, the other pairs are computed in parallel.
+
+    Parameters
+    ----------
+    docs: list
+        List with the distinct preprocessed full_texts (OneStrings) of one table
+    idx_a: np.ndarray
+        Positions in docs of the first job-ad of each pair
+    idx_b: np.ndarray
+        Positions in docs of the second job-ad of each pair
+
+    Returns
+    -------
+    ratios: np.ndarray
+        One ratio per pair, a sim_score between 0 and 1. Describes similarity between the processed strings."""
+
+    ratios = np.zeros(len(idx_a), dtype=np.float64)
+    # Upper bound of the ratio from the lengths: the distance is at least the difference of the lengths
+    lengths = np.array([len(doc) for doc in docs], dtype=np.int64)
+    length_a, length_b = lengths[idx_a], lengths[idx_b]
+    total = length_a + length_b
+    upper_bound = np.divide(2 * np.minimum(length_a, length_b), total, out=np.ones(len(idx_a)), where=total > 0)
+    to_compute = np.flatnonzero(upper_bound >= cutoff)
+    logging.info(f'{len(idx_a) - len(to_compute)} of {len(idx_a)} pairs can not reach cutoff {cutoff} and are skipped.')
+
+    # Compute the remaining pairs in chunks (in parallel, see config.yaml calculation: levenshtein: workers)
+    tasks = [(start, start + CHUNK_SIZE) for start in range(0, len(to_compute), CHUNK_SIZE)]
+    initargs = (docs, idx_a[to_compute], idx_b[to_compute])
+    if workers <= 1 or len(tasks) <= 1:
+        __init_worker(*initargs)
+        results = [__ratio_chunk(task) for task in tasks]
+    else:
+        with Pool(processes=min(workers, len(tasks)), initializer=__init_worker, initargs=initargs) as pool:
+            results = pool.map(__ratio_chunk, tasks)
+    if results:
+        ratios[to_compute] = np.concatenate(results)
+    return ratios
+
+# Pass the documents and pairs once per process
+def __init_worker(docs, idx_a, idx_b):
+    global worker_docs, worker_idx_a, worker_idx_b
+    worker_docs, worker_idx_a, worker_idx_b = docs, idx_a, idx_b
+
+# Compute the ratios for one chunk (start, stop) of the pairs
+def __ratio_chunk(task):
+    start, stop = task
+    return np.array([lev.ratio(worker_docs[a], worker_docs[b]) for a, b in zip(worker_idx_a[start:stop], worker_idx_b[start:stop])], dtype=np.float64)
@@ -3,16 +3,35 @@
     Transforms both strings in Shingle-Sets and computes Cosine- or Jaccard-Similarity depending on passed boolean.
 
     Inspired by https://www.bogotobogo.com/python/python_sets_union_intersection.php 
-    and https://gist.github.com/gaulinmp/da5825de975ed0ea6a24186434c24fe4 """
+    and https://gist.github.com/gaulinmp/da5825de975ed0ea6a24186434c24fe4 
+
+    For all pairs of a table (calculate_shinglingcosine_batch) the shingles are generated once per document as sorted int64 hashes.
+    The similarities are computed via a sparse binary matrix (exact) or via MinHash-signatures (approximately, see config.yaml). """
 
 # ## Imports
+import numpy as np
+import scipy.sparse as sp
+import yaml
+from pathlib import Path
 import re
 import math
+from preprocessing import encoding
+from services import vector_ops
 from collections import Counter
 
-# One Shingle is a string with K-words
+# One Shingle is a string with K-words (max. 2, see TOKEN_BITS)
 K = 2
 
+# ## Open Configuration-file and set MinHash-parameters
+with open(Path("config.yaml"), "r") as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    shingling_params = cfg['calculation']['shingling']
+    minhash = shingling_params['minhash']
+    num_perm = shingling_params['num_perm']
+
+# Bits per token id in the key of a shingle: the K uint32 token ids are put side by side in one uint64 (no collisions for K <= 2)
+TOKEN_BITS = np.uint64(32)
+
 # ## Functions
 def calculate_shinglingcosine(input_full_a: str, input_full_b: str, jaccard: bool) -> float:
     """ Generate two sets of Shingles for each received input string. 
@@ -59,6 +78,52 @@ def calculate_shinglingcosine(input_full_a: str, input_full_b: str, jaccard: boo
         ratio = __cosine(vec1, vec2)
         return ratio
 
+def calculate_shinglingcosine_batch(encoded: encoding.EncodedDocs, idx_a: np.ndarray, idx_b: np.ndarray, jaccard: bool) -> np.ndarray:
+    """ Generate Shingle-Sets for the strings of all pairs and compute Cosine- or Jaccard-Similarity.
+    The shingles are generated once per document (hashed), the shared shingles of all pairs are counted at once.
+    With minhash: true (config.yaml) the shared shingles are estimated from MinHash-signatures.
+
+    Parameters
+    ----------
+    encoded: encoding.EncodedDocs
+        Token ids of the distinct preprocessed full_texts (OneStrings) of one table
+    idx_a: np.ndarray
+        Positions in docs of the first job-ad of each pair
+    idx_b: np.ndarray
+        Positions in docs of the second job-ad of each pair
+    jaccard: bool
+        Boolean from ArgumentParser to decide if the jaccard- or cosine - similarity needs to be calculated.
+
+    Returns
+    -------
+    ratios: np.ndarray
+        One ratio per pair, a sim_score between 0 and 1. Describes similarity between the processed strings."""
+
+    # Generate shingles once per document (one sorted hash array per document)
+    shingle_docs, shingle_hashes = __gen_shingle_hashes(encoded)
+    sizes = np.bincount(shingle_docs, minlength=len(encoded)).astype(np.float64)
+    size_a, size_b = sizes[idx_a], sizes[idx_b]
+
+    # Number of shared shingles per pair (exact or estimated from MinHash-signatures)
+    if minhash == True:
+        signatures = __minhash_signatures(shingle_docs, shingle_hashes, len(encoded))
+        estimate = vector_ops.pairwise_rows(signatures, idx_a, idx_b, lambda rows_a, rows_b: (rows_a == rows_b).mean(axis=1))
+        intersection = estimate * (size_a + size_b) / (1 + estimate)
+    else:
+        _, columns = np.unique(shingle_hashes, return_inverse=True)
+        matrix = sp.csr_matrix((np.ones(len(columns), dtype=np.float64), (shingle_docs, columns.ravel())), shape=(len(encoded), columns.max() + 1 if len(columns) else 0))
+        intersection = vector_ops.pairwise_rows(matrix, idx_a, idx_b, lambda rows_a, rows_b: np.asarray(rows_a.multiply(rows_b).sum(axis=1)).ravel())
+
+    # JACCARD: shared shingles / all shingles of the pair
+    if jaccard == True:
+        denominator = size_a + size_b - intersection
+    # COSINE: each shingle is counted once per set, so the countvector-cosine is shared / sqrt(size_a * size_b)
+    else:
+        denominator = np.sqrt(size_a * size_b)
+    # Pairs without shingles get 0
+    ratios = np.divide(intersection, denominator, out=np.zeros(len(idx_a), dtype=np.float64), where=denominator > 0)
+    return ratios
+
 # Compute Cosine for two vectors
 def __cosine(vec1, vec2):
     intersection = set(vec1.keys()) & set(vec2.keys())
@@ -88,4 +153,48 @@ def __gen_shingle_set(doc):
         for x in tokens[i+1:i+K]:
             t += ' ' + x 
         sh.add(t)
-    return sh
\ No newline at end of file
+    return sh
+
+# Generate the shingles of all documents as keys (same shingles as __gen_shingle_set, each one only once per document)
+# The token ids come from the encoded texts (the preprocessed tokens contain only word characters, so no token is split by \W)
+def __gen_shingle_hashes(encoded):
+    lengths = encoded.lengths()
+    token_ids = encoded.ids.astype(np.uint64)
+    # Shingle i of a document starts with token i, for i in range(len(tokens)-K)
+    doc_of_token = np.repeat(np.arange(len(encoded)), lengths)
+    starts = encoded.offsets[:-1]
+    valid = np.flatnonzero(np.arange(len(token_ids)) - starts[doc_of_token] < lengths[doc_of_token] - K)
+    hashes = np.zeros(len(valid), dtype=np.uint64)
+    for offset in range(K):
+        hashes = (hashes << TOKEN_BITS) | token_ids[valid + offset]
+    # Unique shingles per document, sorted by document and hash
+    shingles = np.unique(np.column_stack((doc_of_token[valid], hashes.view(np.int64))), axis=0)
+    return shingles[:, 0], shingles[:, 1]
+
+# MinHash-signature (num_perm minima of permuted hashes) for each document, documents without shingles keep the max value
+def __minhash_signatures(shingle_docs, shingle_hashes, n_docs):
+    random_state = np.random.RandomState(1)
+    params = random_state.randint(1, np.iinfo(np.int64).max, size=(2, num_perm), dtype=np.int64).astype(np.uint64)
+    # each permutation a*x+b has to be a bijection (odd a)
+    params[0] |= np.uint64(1)
+    signatures = np.full((n_docs, num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    if len(shingle_hashes) == 0:
+        return signatures
+    group_starts = np.flatnonzero(np.r_[True, shingle_docs[1:] != shingle_docs[:-1]])
+    group_docs = shingle_docs[group_starts]
+    hashes = __mix(shingle_hashes.view(np.uint64))
+    for perm in range(num_perm):
+        permuted = hashes * params[0, perm] + params[1, perm]
+        # use the high bits, they are mixed better than the low bits
+        permuted = (permuted >> np.uint64(32)) | (permuted << np.uint64(32))
+        signatures[group_docs, perm] = np.minimum.reduceat(permuted, group_starts)
+    return signatures
+
+# Mix the bits of the shingle keys (splitmix64 finalizer, a bijection: no new collisions). The keys are token ids side by side (TOKEN_BITS),
+# without mixing the high bits of a permutation depend on the last token only
+def __mix(hashes):
+    hashes = hashes ^ (hashes >> np.uint64(30))
+    hashes = hashes * np.uint64(0xbf58476d1ce4e5b9)
+    hashes = hashes ^ (hashes >> np.uint64(27))
+    hashes = hashes * np.uint64(0x94d049bb133111eb)
+    return hashes ^ (hashes >> np.uint64(31))
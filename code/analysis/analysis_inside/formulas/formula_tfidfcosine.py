@@ -8,9 +8,13 @@ Inspired by: https://www.kaggle.com/currie32/predicting-similarity-tfidfvectoriz
         --> only for replication of masterthesis needed """
 
 # ## Imports
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from modeling import tfidf
+from modeling import registry
+from . import sparse_cosine
+from preprocessing import encoding
 
 # ## Set Variables
 tfidf_model = None
@@ -53,8 +57,37 @@ def calculate_tfidfcosine(input_full_a: str, input_full_b: str) -> float:
 
     return cosine
 
+def calculate_tfidfcosine_batch(docs: list, encoded: encoding.EncodedDocs, idx_a: np.ndarray, idx_b: np.ndarray) -> np.ndarray:
+    """ Transform the strings of all pairs in vectors with the TfidfVectorizer() and compute cosine-similarity.
+    Each distinct text is transformed once in one sparse matrix, the pairs only select the rows.
+    The texts are not tokenized again, the TF-IDF vectors are computed from the encoded texts (token ids).
+
+    Parameters
+    ----------
+    docs: list
+        List with the distinct preprocessed full_texts (OneStrings) of one table
+    encoded: encoding.EncodedDocs
+        Token ids of the texts in docs
+    idx_a: np.ndarray
+        Positions in docs of the first job-ad of each pair
+    idx_b: np.ndarray
+        Positions in docs of the second job-ad of each pair
+
+    Returns
+    -------
+    cosines: np.ndarray
+        One cosine per pair, a sim_score between 0 and 1. Describes similarity between the processed strings."""
+
+    # Load model and get object (only loads once and only if script is used)
+    tfidf_model = __envoke_model()
+    # transform each distinct text only once
+    vectors = tfidf.transform_encoded(tfidf_model, docs, encoded)
+    # calculate cosine for all pairs via row-wise dot product
+    cosines = sparse_cosine.pair_cosines(vectors, idx_a, idx_b)
+    return cosines
+
 def __envoke_model(): 
     global tfidf_model
     if tfidf_model is None:
-        tfidf_model = tfidf.load_model('tfidf_model')
+        tfidf_model = registry.get('tfidf_model')
     return tfidf_model
\ No newline at end of file
@@ -0,0 +1,32 @@
+# *** Cosine-Similarity for pairs of sparse vectors ***
+""" Script receives one sparse matrix (one row per distinct document) and two index arrays (pairs a & b).
+    The rows are normalized once, the cosine of each pair is the row-wise dot product of its two rows. """
+
+# ## Imports
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+from services import vector_ops
+
+# ## Functions
+def pair_cosines(vectors: sp.spmatrix, idx_a: np.ndarray, idx_b: np.ndarray) -> np.ndarray:
+    """ Compute cosine-similarity for all pairs of rows.
+
+    Parameters
+    ----------
+    vectors: sp.spmatrix
+        Sparse matrix with one vector per distinct document
+    idx_a: np.ndarray
+        Row positions of the first job-ad of each pair
+    idx_b: np.ndarray
+        Row positions of the second job-ad of each pair
+
+    Returns
+    -------
+    cosines: np.ndarray
+        One cosine per pair. Pairs with an empty vector get 0 (same as cosine_similarity). """
+
+    # normalize each document once (empty rows stay empty)
+    vectors = normalize(sp.csr_matrix(vectors, dtype=np.float64), norm='l2', copy=False)
+    cosines = vector_ops.pairwise_rows(vectors, idx_a, idx_b, lambda rows_a, rows_b: np.asarray(rows_a.multiply(rows_b).sum(axis=1)).ravel())
+    return cosines
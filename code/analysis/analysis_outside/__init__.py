@@ -34,7 +34,7 @@ df_pairs = pd.DataFrame()
 
 # ## Functions
 
-def doc2vec_out(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
+def doc2vec_out(args: dict, dict_testdata: dict, dict_traindata: dict, dict_combined: dict = None) -> None:
     """ analysis_outside (searches for duplicates for the testdata in the traindata).
         Option:
             * doc2vec
@@ -51,7 +51,9 @@ def doc2vec_out(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
     dict_testdata : dict
         Dictionary with testdata -> keys: table_names, values: DataFrames with job-ads
     dict_traindata: dict
-        Dictionary with trainingdata -> keys: table_names, values: DataFrames with job-ads """
+        Dictionary with trainingdata -> keys: table_names, values: DataFrames with job-ads
+    dict_combined: dict
+        Optional: tables of the combined preprocessing of dict_testdata, used instead of tokenizing the testdata again """
     
     # Set Variables
     # Dict to store preprocessed testdata
@@ -70,7 +72,7 @@ def doc2vec_out(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
     # Preprocessing
     if method_args['preprocessing']:
         logging.info('Step Preprocessing in analysis_outside started.')
-        dict_testdata_prepro, dict_testdata = doc2vec_finder.step_preprocessing(dict_testdata, step_key)
+        dict_testdata_prepro, dict_testdata = doc2vec_finder.step_preprocessing(dict_testdata, step_key, dict_combined)
         logging.info('Step Preprocessing in analysis_outside finished.')
     # Find_most_similar
     if method_args['mostsim']:
@@ -87,7 +89,7 @@ def doc2vec_out(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
     # Preprocessing, Find_most_similar, Pairing
     if method_args['preprocessing'] == False and method_args['mostsim'] == False and method_args['pairing'] == False:
         logging.info('Step Preprocessing in analysis_outside started.')
-        dict_testdata_prepro, dict_testdata = doc2vec_finder.step_preprocessing(dict_testdata, step_key)
+        dict_testdata_prepro, dict_testdata = doc2vec_finder.step_preprocessing(dict_testdata, step_key, dict_combined)
         logging.info('Step Preprocessing in analysis_outside finished.')
         logging.info('Step find_most_similar in analysis_outside started.')
         sims_dict, mysimslist_test, mysimslist_train = doc2vec_finder.step_most_similar(dict_testdata_prepro)
@@ -28,7 +28,7 @@ with open(Path("config.yaml"), "r") as yamlfile:
 # ## Functions
 
 # ----- Preprocessing -----
-def step_preprocessing(dict_testdata: dict, step_key: str) -> Union[dict, dict]:
+def step_preprocessing(dict_testdata: dict, step_key: str, dict_combined: dict = None) -> Union[dict, dict]:
     """* preprocessing
             1. Load data if not already loaded 
             2. Pass data to preprocessing and manage returned data
@@ -40,6 +40,8 @@ def step_preprocessing(dict_testdata: dict, step_key: str) -> Union[dict, dict]:
         Dictionary with testdata -> keys: table_names, values: DataFrames with job-ads
     step_key: str
         String with the step_key to define which parts of the program need to be used
+    dict_combined: dict
+        Optional: tables of the combined preprocessing of dict_testdata (keys: table_names), used instead of tokenizing the tables again
     
     Raises
     ------
@@ -74,7 +76,7 @@ def step_preprocessing(dict_testdata: dict, step_key: str) -> Union[dict, dict]:
 
     # Preprocessing
     for name, df in dict_testdata.items():
-        test_corpus = preprocessing.preprocess_data(df, step_key)
+        test_corpus = preprocessing.preprocess_data(df, step_key, (dict_combined or dict()).get(name))
         dict_testdata_prepro[name] = test_corpus
 
     # dump preprocessed dict in a backupfile
@@ -1,11 +1,19 @@
 # *** Doc2Vec - Find most similar***
-""" Script to infer the passed TaggedDocument-objects and extract the most_similar documents from model."""
+""" Script to infer the passed TaggedDocument-objects and extract the most_similar documents from model.
+    All documents are inferred at once by several worker processes (model memory-mapped and shared).
+    search_mode (config.yaml):
+        * 'exact': each vector is compared with all docvecs (docvecs.most_similar) one by one.
+        * 'batch': all vectors are compared with all docvecs via matrix products (same results as 'exact').
+        * 'ann': the most_similar documents are looked up in the ANN-Index of the model instead of all docvecs."""
 
 # ## Imports
 import os
 from nltk.corpus import stopwords 
 import collections
-from modeling import doc2vec
+from modeling import registry
+from modeling.doc2vec import ann_index
+from modeling.doc2vec import infer
+from modeling.doc2vec import search
 from typing import Union
 import yaml
 from pathlib import Path
@@ -20,6 +28,7 @@ with open(Path("config.yaml"), "r") as yamlfile:
     cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
     d2v_model_type = cfg['d2v_model_type']
     d2v_type = d2v_model_type['type']
+    search_mode = cfg['most_similar']['search_mode']
 
 
 # ## Function
@@ -40,29 +49,35 @@ def finder(dict_testdata_prepro: dict) -> Union[dict, list, list]:
     traindata_sims_ids: list 
         List contains all traindata unique_ids from sims_dict values """
     
-    # pass type of d2v_model you want to use to find most similar (d2v_model or d2v_remodel, change in config.yaml manually)
-    d2v_model = doc2vec.load_model(d2v_type)
-
     # Set Variables
     sims_dict = dict()
     testdata_sim_ids = list()
     traindata_sim_ids = list()
 
-    def __infer_texts():
-        # Iterate over tables in dict
-        for table_content in dict_testdata_prepro.items():
-            # Iterate over each datapiece in table
-            for item in table_content[1]:
-                # Infer_vector with token and find most_similar in docvecs from model
-                sims = d2v_model.docvecs.most_similar([d2v_model.infer_vector(item.words)])
-                # Store most_similars for each item (job-ad) in the sims_dict (keys: item id, values: sims_ids)
-                sims_dict[item.tags[0]] = [i[0] for i in sims]
-        try:
-            logging.info('\n\n*** Random sample from Analysis_outside for Evaluation ***\n')
-            logging.info('Document ({}): «{}»\nhas the following most similar unique_id matches\n {}'.format(item.tags[0], ' '.join(item.words), sims))
-        except:
-            pass
-    __infer_texts()
+    # Infer all texts at once (in parallel, each worker process maps the model read-only, see config.yaml doc2vec_model: infer_workers)
+    items = list(itertools.chain.from_iterable(dict_testdata_prepro.values()))
+    vectors = infer.infer_vectors(d2v_type, [item.words for item in items])
+
+    # Find most_similar for all vectors depending on search_mode
+    if search_mode == 'ann':
+        # look up in the ANN-Index of the model
+        results = ann_index.search(ann_index.load_index(d2v_type), vectors)
+    else:
+        # pass type of d2v_model you want to use to find most similar (d2v_model or d2v_remodel, change in config.yaml manually)
+        d2v_model = registry.get(d2v_type)
+        if search_mode == 'batch':
+            # compare all vectors with all docvecs via matrix products
+            results = search.most_similar_batch(d2v_model, vectors)
+        else:
+            # compare each vector with all docvecs of the model
+            results = [d2v_model.docvecs.most_similar([vector]) for vector in vectors]
+
+    # Store most_similars for each item (job-ad) in the sims_dict (keys: item id, values: sims_ids)
+    for item, sims in zip(items, results):
+        sims_dict[item.tags[0]] = [i[0] for i in sims]
+    if items:
+        logging.info('\n\n*** Random sample from Analysis_outside for Evaluation ***\n')
+        logging.info('Document ({}): «{}»\nhas the following most similar unique_id matches\n {}'.format(item.tags[0], ' '.join(item.words), sims))
 
     # Store unique_ids from testdata on list testdata_sim_ids and uids from traindata on list traindata_sim_ids 
     testdata_sim_ids = list(sims_dict.keys())
@@ -1,18 +1,31 @@
 # *** TF-IDF - Find most similar ***
 """ Script to vectorize the passed datasets, compute cosine between the datasets and get the most_similar documents.
+The testdata is compared in blocks (block_size in config.yaml) with the traindata via sparse matrix products, 
+so only one block of similarities is in memory at once. The TOPN most similar job-ads of each row are selected with argpartition.
 Inspired by: https://goodboychan.github.io/chans_jupyter/python/datacamp/natural_language_processing/2020/07/17/04-TF-IDF-and-similarity-scores.html"""
 
 # ## Imports
-from sklearn.metrics.pairwise import linear_kernel
 import pandas as pd
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from modeling import tfidf
+from modeling import registry
+from preprocessing import encoding
 from typing import Union
 import itertools
+import yaml
+from pathlib import Path
 import logging
 
 # ## Set Variables
 tfidf_model = None
+# Number of most similar job-ads per testdata job-ad
+TOPN = 10
+
+# ## Open Configuration-file and set block size
+with open(Path("config.yaml"), "r") as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    block_size = cfg['most_similar']['block_size']
 
 def most_similar(dict_testdata_prepro: dict, dict_traindata_prepro: dict) -> Union[dict, list, list]:
     """ Uses the preprocessed test- and traindata (dict with unique_ids and OneStrings) to compute cosine between those with the TF-IDF model 
@@ -35,7 +48,7 @@ def most_similar(dict_testdata_prepro: dict, dict_traindata_prepro: dict) -> Uni
         List contains all traindata unique_ids from sims_dict values """
 
     # load the model
-    tfidf_model = tfidf.load_model("tfidf_model")
+    tfidf_model = registry.get("tfidf_model")
 
     # set vars for most_similar unique_ids
     sims_dict = dict()
@@ -49,22 +62,22 @@ def most_similar(dict_testdata_prepro: dict, dict_traindata_prepro: dict) -> Uni
     testing_data = pd.DataFrame([(i, j) for i, j in [dic.items() for dic in dict_testdata_prepro.values()][0]], 
                 columns=['unique_id','OneString'])
     
-    # Set indices to find the needed data
-    indices_train = pd.Series(training_data.index, index=training_data['unique_id'])
-    indices_test = pd.Series(testing_data.index, index=testing_data['unique_id'])
-    indices = indices_train.append(indices_test)
-
-    # Construct the TF-IDF Matrix with the two input sets
-    train_vecs = tfidf_model.transform(training_data['OneString'])
-    test_vecs = tfidf_model.transform(testing_data['OneString'])
-
-    # Generate the cosine similarity matrix
-    cosine_sim = linear_kernel(test_vecs, train_vecs)
+    # Construct the TF-IDF Matrix with the two input sets (from the encoded texts, see preprocessing.encoding)
+    train_vecs = tfidf.transform_encoded(tfidf_model, training_data['OneString'], encoding.encode_texts(training_data['OneString']))
+    test_vecs = tfidf.transform_encoded(tfidf_model, testing_data['OneString'], encoding.encode_texts(testing_data['OneString']))
+    train_vecs_t = train_vecs.T.tocsr()
+    train_ids = training_data['unique_id'].to_numpy()
+    topn = min(TOPN, len(training_data))
 
-    # Extract most_similar traindata-ids for each testdata-id and store them in sims_dict
-    for uid in testing_data['unique_id']:
-        sims = __get_most_similar(uid, cosine_sim, indices, training_data)
-        sims_dict[uid] = sims.to_list()
+    # Compute the cosine similarity (linear_kernel) block by block and extract most_similar traindata-ids for each testdata-id
+    for start in range(0, len(testing_data), block_size):
+        cosine_block = (test_vecs[start:start + block_size] @ train_vecs_t).tocsr()
+        cosine_block.eliminate_zeros()
+        cosine_block.sort_indices()
+        for row, uid in enumerate(testing_data['unique_id'].iloc[start:start + block_size]):
+            data_indices = __get_most_similar(cosine_block, row, topn)
+            sims = train_ids[data_indices]
+            sims_dict[uid] = sims.tolist()
 
     # Store unique_ids from testdata on list testdata_sim_ids and uids from traindata on list traindata_sim_ids 
     testdata_sim_ids = list(sims_dict.keys())
@@ -72,21 +85,28 @@ def most_similar(dict_testdata_prepro: dict, dict_traindata_prepro: dict) -> Uni
 
     # Log random sample
     logging.info('\n\n*** Random sample from Analysis_outside for Evaluation ***\n')
-    logging.info('Document ({}): «{}»\nhas the following most similar unique_id matches\n{}'.format(uid, testing_data.loc[testing_data['unique_id'] == uid, 'OneString'], sims.to_list()))
+    logging.info('Document ({}): «{}»\nhas the following most similar unique_id matches\n{}'.format(uid, testing_data.loc[testing_data['unique_id'] == uid, 'OneString'], sims.tolist()))
     
     return sims_dict, testdata_sim_ids, traindata_sim_ids
 
-def __get_most_similar(uid, cosine_sim, indices, training_data):
-    # Get the index of the job-ad that matches the uid
-    idx = indices[uid]
-    # Get the pairwise similarity scores
-    sim_scores = list(enumerate(cosine_sim[idx]))
+# Positions of the topn most similar traindata job-ads for one row of the cosine block.
+# Same order as a stable sort by score (descending): with equal scores the lower position comes first.
+def __get_most_similar(cosine_block, row, topn):
+    row_start, row_end = cosine_block.indptr[row], cosine_block.indptr[row + 1]
+    scores = cosine_block.data[row_start:row_end]
+    columns = cosine_block.indices[row_start:row_end]
+    if len(scores) > topn:
+        # Get the scores for the topn most similar job-ads (ties at the border: lower positions are kept)
+        kth_score = scores[np.argpartition(-scores, topn - 1)[:topn]].min()
+        higher = np.flatnonzero(scores > kth_score)
+        equal = np.flatnonzero(scores == kth_score)[:topn - len(higher)]
+        selected = np.concatenate((higher, equal))
+        scores, columns = scores[selected], columns[selected]
     # Sort the job-ads based on the similarity scores
-    sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-    # Get the scores for 10 most similar movies
-    sim_scores = sim_scores[0:10]
-    # Get the jobs-ads with the indices
-    # sim_scores is a list of lists (indx, score), (indx, score)... with the indx we can extract the uid form the indices (above)
-    data_indices = [i[0] for i in sim_scores]
-    # Return the top 10 most similar movies
-    return training_data['unique_id'].iloc[data_indices]
\ No newline at end of file
+    order = np.lexsort((columns, -scores))
+    data_indices = columns[order]
+    # Job-ads without any shared term have score 0 and follow in order of their positions
+    if len(data_indices) < topn:
+        zero_scores = np.setdiff1d(np.arange(2 * topn), data_indices)[:topn - len(data_indices)]
+        data_indices = np.concatenate((data_indices, zero_scores))
+    return data_indices
@@ -0,0 +1,131 @@
+# *** Blocking for analysis_inside ***
+""" Script finds all potential duplicate pairs inside one DataFrame at once (instead of comparing row by row).
+    For each filter the rows are grouped in blocks with the same key:
+        * Filter 1: full_text
+        * Filter 2: location_name
+        * Filter 3: profession_isco_code (and advertiser_name is part of the other advertiser_name)
+        * Filter 4: only date (if the three filters above are switched off)
+    Inside a block the rows are sorted by date, so the +-date_past/date_future frame of each row can be found via binary search.
+
+    The pairs are returned in the same order as the former row-by-row filter produced them:
+    row by row, filter by filter and inside a filter in order of the DataFrame. A pair a&b OR b&a is only kept once. """
+
+# ## Imports
+import pandas as pd
+import numpy as np
+import logging
+
+# ## Functions
+def candidate_pairs(df: pd.DataFrame, date_past: int, date_future: int, full_param: bool, location_param: bool, profisco_advname_param: bool) -> np.ndarray:
+    """ Finds all pairs of rows which pass the metadata-filter.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        One table from dictionary with the whole dataset. Contains metadata and full_texts.
+    date_past: int
+        Days before the date of a job-ad in which another job-ad counts as potential duplicate.
+    date_future: int
+        Days after the date of a job-ad in which another job-ad counts as potential duplicate.
+    full_param, location_param, profisco_advname_param: bool
+        Settings of the metadata-filter (config.yaml).
+
+    Returns
+    -------
+    pairs: np.ndarray
+        Array with shape (n_pairs, 2). Each row contains the positions (iloc) of the two job-ads of one pair. """
+
+    n_rows = len(df)
+    seconds, date_valid, date_past_s, date_future_s = __date_arrays(df, date_past, date_future)
+
+    list_first = list()
+    list_second = list()
+    list_filter = list()
+
+    # Collect the pairs of each filter, the filter number is needed to restore the order of the pairs
+    for filter_nr, codes in __block_codes(df, full_param, location_param, profisco_advname_param):
+        first, second = __window_join(codes, seconds, date_valid, date_past_s, date_future_s)
+        if filter_nr == 3:
+            keep = __advertiser_contained(df, first, second)
+            first, second = first[keep], second[keep]
+        list_first.append(first)
+        list_second.append(second)
+        list_filter.append(np.full(len(first), filter_nr, dtype=np.int8))
+
+    if not list_first:
+        return np.empty((0, 2), dtype=np.int64)
+    first = np.concatenate(list_first)
+    second = np.concatenate(list_second)
+    filters = np.concatenate(list_filter)
+
+    # Order of the former loop: row (first), filter, row inside the filter (second)
+    order = np.lexsort((second, filters, first))
+    first, second = first[order], second[order]
+    # Keep each pair a&b OR b&a only once (the first one found)
+    pair_keys = np.minimum(first, second).astype(np.int64) * n_rows + np.maximum(first, second)
+    _, first_found = np.unique(pair_keys, return_index=True)
+    first_found.sort()
+    pairs = np.column_stack((first[first_found], second[first_found]))
+    logging.info(f'Blocking found {len(pairs)} potential pairs in {n_rows} job-ads.')
+    return pairs
+
+# Dates as seconds, invalid dates are excluded from pairing
+def __date_arrays(df, date_past, date_future):
+    n_rows = len(df)
+    try:
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        date_valid = dates.notna().to_numpy()
+        seconds = np.zeros(n_rows, dtype=np.int64)
+        seconds[date_valid] = dates[date_valid].to_numpy().astype('datetime64[s]').astype(np.int64)
+        return seconds, date_valid, int(date_past) * 86400, int(date_future) * 86400
+    except (KeyError, AttributeError) as err:
+        logging.warning(f'The metadata-field(s) "date" could not be used. Continue without it. Error message:{err}')
+        return np.zeros(n_rows, dtype=np.int64), np.ones(n_rows, dtype=bool), 0, 0
+
+# Block keys of each switched on filter as integer codes (-1 means: row has no key and is not paired by this filter)
+def __block_codes(df, full_param, location_param, profisco_advname_param):
+    for filter_nr, param, column in [(1, full_param, 'full_text'), (2, location_param, 'location_name'), (3, profisco_advname_param, 'profession_isco_code')]:
+        if param == True:
+            try:
+                codes, _ = pd.factorize(df[column])
+                yield filter_nr, codes
+            except KeyError as err:
+                logging.warning(f'The metadata-field(s) {column} could not be used. Continue without it. Error message:{err}')
+    if full_param != True and location_param != True and profisco_advname_param != True:
+        yield 4, np.zeros(len(df), dtype=np.int64)
+
+# Join each row with all rows of the same block inside its date frame
+def __window_join(codes, seconds, date_valid, date_past_s, date_future_s):
+    rows = np.flatnonzero((codes >= 0) & date_valid)
+    if len(rows) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    offset = seconds[rows] - seconds[rows].min()
+    # One sortable key per row: blocks do not overlap because each block has its own range of keys
+    span = int(offset.max()) + date_past_s + date_future_s + 1
+    keys = codes[rows].astype(np.int64) * span + offset + date_past_s
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    lower = np.searchsorted(sorted_keys, keys - date_past_s, side='left')
+    upper = np.searchsorted(sorted_keys, keys + date_future_s, side='right')
+    counts = upper - lower
+    # Expand the frames [lower, upper) of all rows to flat arrays
+    first = np.repeat(rows, counts)
+    starts = np.repeat(lower - np.cumsum(counts) + counts, counts)
+    second = rows[order[starts + np.arange(counts.sum())]]
+    # A datapiece is not paired with itself
+    keep = first != second
+    return first[keep], second[keep]
+
+# Filter 3: advertiser_name of the second job-ad contains the advertiser_name of the first one
+def __advertiser_contained(df, first, second):
+    try:
+        codes, names = pd.factorize(df['advertiser_name'])
+    except KeyError as err:
+        logging.warning(f'The metadata-field(s) profession_isco_code and advertiser_name could not be used. Continue without it. Error message:{err}')
+        return np.zeros(len(first), dtype=bool)
+    code_first, code_second = codes[first], codes[second]
+    valid = (code_first >= 0) & (code_second >= 0)
+    combination_keys = code_first.astype(np.int64) * len(names) + code_second
+    # Compare every combination of advertiser_names only once
+    contained_keys = [key for key in np.unique(combination_keys[valid]) if str(names[key // len(names)]) in str(names[key % len(names)])]
+    return valid & np.isin(combination_keys, contained_keys)
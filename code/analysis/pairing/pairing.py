@@ -17,6 +17,7 @@ import os
 import yaml
 from pathlib import Path
 import logging
+from . import blocking
 
 # ## Define Variables
 known_dupls = list()
@@ -138,7 +139,8 @@ def __check_filter():
 # *** Filtering for analysis_inside ***
 def filter_inside(df_current: pd.DataFrame) -> pd.DataFrame:
     """ Uses the Metadata given in DataFrame to compare the job-ads in the data.
-    Because pairs are searched inside one DataFrame, the 'groupby' operation (pandas) is useful and saves memory.
+    Because pairs are searched inside one DataFrame, all pairs are found at once by the blocking (see blocking.py):
+    the rows are grouped by the filter-values and joined inside their date frame.
         * Date Ranges in a +-60 days frame AND
             * Full_texts are equal or
             * LocationNames are equal or 
@@ -151,7 +153,7 @@ def filter_inside(df_current: pd.DataFrame) -> pd.DataFrame:
     
     Raises
     ------
-    KeyError, AttributeError, UnboundLocalError
+    KeyError, AttributeError
         If errors within the dataframe occur and one filter might not work.
 
     Returns
@@ -163,70 +165,11 @@ def filter_inside(df_current: pd.DataFrame) -> pd.DataFrame:
     # Checks and Sets the metadata-filter values once.
     date_past, date_future, full_param, location_param, profisco_advname_param = __check_filter()
 
-    # Initiate Backup to check if pair is already filtered.
-    memory_list = list()
-    # Set Output DatFrame
-    df_pairs = pd.DataFrame()
-
-
-    for ind1 in df_current.index:
-        memory_list.append((df_current.unique_id[ind1], df_current.unique_id[ind1]))
-        
-        # FILTER DATE FOR FILTER 1 FILTER 2 and FILTER 3
-        try:
-            current = pd.to_datetime(df_current.date[ind1])
-            past = str(current - pd.DateOffset(days=date_past))
-            future = str(current + pd.DateOffset(days=date_future))
-            df_date= df_current.loc[df_current['date'].between(past, future, inclusive=True)]
-        except (KeyError, AttributeError, UnboundLocalError) as err:
-            logging.warning(f'The metadata-field(s) "date" could not be used. Continue without it. Error message:{err}')
-            df_date = df_current
-            pass
-
-        # FILTER 1: FULLTEXT
-        if full_param == True:
-            try:
-                testdf = df_date.groupby('full_text').get_group(str(df_current.full_text[ind1]))
-                for ind in testdf.index:
-                    memory_list, df_pairs = __searcher_inside(testdf, ind, df_current, ind1, memory_list, df_pairs)
-            except (KeyError, AttributeError, UnboundLocalError) as err:
-                logging.warning(f'The metadata-field(s) full_text could not be used. Continue without it. Error message:{err}')
-                pass
-        else:
-            pass
-
-        # FILTER 2: LOCATIONNAME
-        if location_param == True:
-            try:
-                testdf = df_date.groupby('location_name').get_group(str(df_current.location_name[ind1]))
-                for ind in testdf.index:
-                    memory_list, df_pairs = __searcher_inside(testdf, ind, df_current, ind1, memory_list, df_pairs)
-            except (KeyError, AttributeError, UnboundLocalError) as err:
-                logging.warning(f'The metadata-field(s) location_name could not be used. Continue without it. Error message:{err}')
-                pass
-        else:
-            pass
-
-        # FILTER 3: PROFESSION_ISCO_CODE AND ADVERTISER_NAME
-        if profisco_advname_param == True:
-            try:
-                testdf = df_date.groupby('profession_isco_code').get_group(str(df_current.profession_isco_code[ind1])) 
-                testdf = testdf.loc[testdf['advertiser_name'].str.contains(df_current.advertiser_name[ind1], na=False, regex=False)]
-                for ind in testdf.index:
-                    memory_list, df_pairs = __searcher_inside(testdf, ind, df_current, ind1, memory_list, df_pairs)
-            except (KeyError, AttributeError, UnboundLocalError) as err:
-                logging.warning(f'The metadata-field(s) profession_isco_code and advertiser_name could not be used. Continue without it. Error message:{err}')
-                pass      
-        else:
-            pass
-        try:
-            if full_param != True and location_param != True and profisco_advname_param != True:
-                for ind in df_date.index:
-                    memory_list, df_pairs = __searcher_inside(df_date, ind, df_current, ind1, memory_list, df_pairs)
-        except (KeyError, AttributeError, UnboundLocalError) as err:
-                logging.warning(f'The metadata-field(s) location_name could not be used. Continue without it.Error message:{err}')
-                pass
+    # Find all pairs (positions of both datapieces), each pair a&b OR b&a only once
+    pairs = blocking.candidate_pairs(df_current, date_past, date_future, full_param, location_param, profisco_advname_param)
 
+    # Output DataFrame: the two datapieces of a pair follow each other
+    df_pairs = df_current.iloc[pairs.ravel()].reset_index(drop=True)
     return df_pairs
 
 # *** Filtering for analysis_outside ***
@@ -308,18 +251,6 @@ def filter_outside(datapiece_1: pd.DataFrame, datapiece_2: pd.DataFrame, df_pair
             pass
     return df_pairs
 
-def __searcher_inside(testdf, ind, df_current, ind1, memory_list, df_pairs):
-    backup = (testdf.unique_id[ind], df_current.unique_id[ind1])
-    backup2 = (df_current.unique_id[ind1], testdf.unique_id[ind])
-    # check if one of them is already in the new dataframe:
-    if not(memory_list.__contains__(backup)) and not(memory_list.__contains__(backup2)): 
-        # Add new pairs to final DataFrame (df_pairs)
-        df_pairs = df_pairs.append(df_current.iloc[ind1], ignore_index=True)
-        df_pairs = df_pairs.append(df_current[df_current.unique_id == testdf.unique_id[ind]], ignore_index=True)
-        memory_list.append(backup)
-        memory_list.append(backup2)
-    return memory_list, df_pairs
-
 def __searcher_outside(datapiece_1, datapiece_2, memory_list, df_pairs):
     backup = (datapiece_2.unique_id, datapiece_1.unique_id)
     backup2 = (datapiece_1.unique_id, datapiece_2.unique_id)
@@ -348,19 +279,11 @@ def pair_labeling(df_pairs: pd.DataFrame) -> pd.DataFrame:
     df_pairs: pd.DataFrame
         Paired dataset stored in a DataFrame with pairing_labels.
     """
-    t = 1                  
-    skipper = 0
-    for (indx1),(indx2) in zip(df_pairs[:-1].index,df_pairs[1:].index):
-        if skipper == 0:
-            labela = str(t) + '_a'
-            labelb = str(t) + '_b'
-            df_pairs.at[indx1, 'pairing_label'] = labela
-            df_pairs.at[indx2, 'pairing_label'] = labelb
-            t += 1
-            skipper = 1
-        else:
-            skipper = 0
-            continue
+    # Label only complete pairs (an odd last row stays without label)
+    n_labeled = len(df_pairs) - len(df_pairs) % 2
+    positions = np.arange(n_labeled)
+    labels = (positions // 2 + 1).astype(str).astype(object) + np.where(positions % 2 == 0, '_a', '_b')
+    df_pairs.loc[df_pairs.index[:n_labeled], 'pairing_label'] = labels
     return df_pairs
 
 def annotate_results(df_pairs: pd.DataFrame) -> pd.DataFrame:
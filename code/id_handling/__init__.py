@@ -99,6 +99,10 @@ def __process_testdata() -> dict:
 def __get_structure(conn: sqlite3.Connection, conn_output: sqlite3.Connection) -> dict:
     dict_data = dict()
     dict_id_data = dict()
+    # Streaming: give unique_ids chunkwise and write each chunk directly in output (following steps reload the data from output)
+    if manage_dfs.stream_chunks:
+        __stream_structure(conn, conn_output)
+        return dict_id_data
     # Read dataframe from input conn
     dict_data = manage_dfs.get_df(conn)
     logging.info('Read Dataframe from Trainingdata (raw) input.')
@@ -113,4 +117,17 @@ def __get_structure(conn: sqlite3.Connection, conn_output: sqlite3.Connection) -
     # close connections
     conn.close()
     conn_output.close()
-    return dict_id_data
\ No newline at end of file
+    return dict_id_data
+
+def __stream_structure(conn: sqlite3.Connection, conn_output: sqlite3.Connection) -> None:
+    written_tables = set()
+    logging.info('Generate unique_ids chunkwise for each row (aka dataset) in Database and add unique_ids in column "unique_id".')
+    for key, df_chunk in manage_dfs.iter_chunks(conn):
+        # Generate ids for each chunk (ids are counted on over all chunks of a table)
+        df_ids = give_unique_ids.main(path_last_id, df_chunk)
+        manage_dfs.write_chunk_output(conn_output, key, df_ids, key not in written_tables)
+        written_tables.add(key)
+    logging.info('Unique_ids were generated and chunks were saved in new output file for ids.')
+    # close connections
+    conn.close()
+    conn_output.close()
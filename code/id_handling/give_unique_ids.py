@@ -9,10 +9,13 @@ import fileinput
 import os
 import logging
 import pandas as pd
+import numpy as np
 from pathlib import Path
 
 # ## Define Variables
 path_last_id = None
+# Characters of the hex digits 0-F (uppercase)
+HEX_DIGITS = np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)
 
 # ## Functions
 
@@ -27,28 +30,28 @@ def __write_current_hex(path_last_id: Path, currentHex: str):
     file.write(currentHex)
     file.close()
 
-def __generate_id(path_last_id: Path) -> str:
-    # read last used hex number
-    currentHex = __get_current_hex(path_last_id)
-
-    # count hex number
-    counter = int(currentHex, 16) + 1
-    new_hex = hex(counter)
-    currentHex = new_hex[2:].upper()
-
-    # write current hex number in file
-    __write_current_hex(path_last_id, currentHex)
-
-    newUID = ""
-    for _ in range(16 - len(currentHex)):
-        newUID = newUID + "0"
-    newUID = newUID + currentHex
-    newUID = newUID[:4] + '-' + newUID[4:8] + '-' + newUID[8:12] + '-' + newUID[12::] 
-    return newUID
+def __reserve_ids(path_last_id: Path, count: int) -> int:
+    # read last used hex number once and write the last number of the block (the ids of the block are reserved)
+    first = int(__get_current_hex(path_last_id), 16) + 1
+    __write_current_hex(path_last_id, hex(first + count - 1)[2:].upper())
+    return first
 
+def __format_ids(first: int, count: int) -> np.ndarray:
+    # ids are the hex numbers with 16 digits (leading zeros) and dashes after 4, 8 and 12 digits: XXXX-XXXX-XXXX-XXXX
+    if first + count - 1 >= 1 << 64:
+        # more than 16 digits (too big for uint64): formatted one by one, the last part gets the additional digits
+        hexes = ['{:016X}'.format(counter) for counter in range(first, first + count)]
+        return np.array([newUID[:4] + '-' + newUID[4:8] + '-' + newUID[8:12] + '-' + newUID[12::] for newUID in hexes], dtype=object)
+    counters = np.arange(count, dtype=np.uint64) + np.uint64(first)
+    # one hex digit per 4 bits, most significant first
+    digits = (counters[:, None] >> (np.arange(15, -1, -1, dtype=np.uint64) * np.uint64(4))) & np.uint64(0xF)
+    chars = HEX_DIGITS[digits.astype(np.intp)]
+    chars = np.insert(chars, [4, 8, 12], ord('-'), axis=1)
+    return np.ascontiguousarray(chars).view('S19').ravel().astype(str).astype(object)
 
 def main(path_last_id: Path, df_ids: pd.DataFrame) -> pd.DataFrame:
-    ''' Function to iterate over each row in passed Dataframe. Generate and give unique_ids to each row and store the new id in the column "unique_id" in DataFrame.
+    ''' Function to generate and give unique_ids to each row in passed Dataframe and store the new id in the column "unique_id" in DataFrame.
+    The ids of all rows are reserved at once (one read and one write of the file with the last_unique_id) and formatted together.
 
     Parameters
     ----------
@@ -64,9 +67,13 @@ def main(path_last_id: Path, df_ids: pd.DataFrame) -> pd.DataFrame:
     '''
     # Prepare column 'unique_ids' in Output
     df_ids = df_ids.drop(['unique_id'], axis=1, errors='ignore')
-    # Iterate over each row in Dataframe and give unique_ids
-    for row in df_ids.itertuples():
-        unique_id = __generate_id(path_last_id)
-        df_ids.at[row.index, 'unique_id'] = unique_id
-    logging.info(f'New last unique_id is: {unique_id}.')
+    if len(df_ids) == 0:
+        df_ids['unique_id'] = pd.Series(dtype=object)
+        logging.info('No rows were passed, no unique_ids were generated.')
+        return df_ids
+    # Reserve one block of ids for all rows (one read and one write of the file) and give them in the order of the rows
+    first = __reserve_ids(path_last_id, len(df_ids))
+    unique_ids = __format_ids(first, len(df_ids))
+    df_ids['unique_id'] = unique_ids
+    logging.info(f'New last unique_id is: {unique_ids[-1]}.')
     return df_ids
\ No newline at end of file
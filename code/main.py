@@ -39,8 +39,8 @@ MODELING (depends on id_handling first):
             python main.py modeling
                 optional: --modeling_type tfidf or --modeling_type doc2vec
                 default: --modeling_type doc2vec
-                specification: --training and/or --retraining and/or --sanity_check
-                    --> retraining only for doc2vec
+                specification: --training and/or --retraining and/or --sanity_check and/or --compact
+                    --> retraining and compact only for doc2vec (--compact saves a lean model for the analysis: d2v_compact)
 
             e.g. if you want to train a doc2vec model and do a sanity_check afterwards (and specifically no retraining),  call:
                     python main.py modeling --modeling_type doc2vec --training --sanity_check 
@@ -92,6 +92,7 @@ ALL_IN_ONE:
 from modeling import modeling_dist
 from analysis import analysis_in
 from analysis import analysis_out
+from analysis import combined_testdata
 from id_handling import id_manager
 import os
 import pandas as pd 
@@ -200,10 +201,12 @@ def analyze(args: dict, dict_testdata: dict, dict_traindata: dict) -> None:
         logging.info('\n\n***** ANALYSIS_OUTSIDE *****')
         analysis_out(args, dict_testdata, dict_traindata)
     else:
+        # both analysis steps use the same tokens of the testdata (tokenized once)
+        dict_combined = combined_testdata(args, dict_testdata)
         logging.info('\n\n*****ANALYSIS_INSIDE *****')
-        analysis_in(args, dict_testdata, dict_traindata)
+        analysis_in(args, dict_testdata, dict_traindata, dict_combined)
         logging.info('\n\n***** ANALYSIS_OUTSIDE *****')
-        analysis_out(args, dict_testdata, dict_traindata)
+        analysis_out(args, dict_testdata, dict_traindata, dict_combined)
     logging.info('\n\n***** /ANALYSIS ****\n')
 
 # ########## /FUNCTIONS ##########
@@ -239,6 +242,7 @@ def get_application_parser() -> argparse.ArgumentParser:
     modeling_parser.add_argument('--training', action="store_true")
     modeling_parser.add_argument('--retraining', action="store_true")
     modeling_parser.add_argument('--sanity_check', action="store_true")
+    modeling_parser.add_argument('--compact', action="store_true")
     modeling_parser.set_defaults(func=modeling)
 
     # 3. subparser 'analysis'
@@ -274,6 +278,7 @@ def get_application_parser() -> argparse.ArgumentParser:
     allinone_parser.add_argument('--training', action="store_true")
     allinone_parser.add_argument('--retraining', action="store_true")
     allinone_parser.add_argument('--sanity_check', action="store_true")
+    allinone_parser.add_argument('--compact', action="store_true")
     allinone_parser.add_argument('--method_out', 
                                     choices=['doc2vec', 'tfidf'],
                                     default='doc2vec')
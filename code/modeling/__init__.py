@@ -6,10 +6,13 @@
 # ## Imports
 from . import doc2vec
 from . import tfidf
+from . import registry
 import logging
 from services import connection_preparation
 from services import manage_dfs
 import preprocessing
+import sqlite3
+from typing import Iterator, Tuple, Union
 
 # ## Functions
 def modeling_dist(args:dict, dict_testdata: dict, dict_traindata: dict) -> None:
@@ -74,4 +77,68 @@ def preprocess_data(dict_data: dict, step_key: str) -> dict:
         logging.info(f'Preprocessing for table {name} started.')
         test_corpus = preprocessing.preprocess_data(df, step_key)
         dict_data_prepro[name] = test_corpus
+    return dict_data_prepro
+
+def prepro_testdata(dict_testdata: dict, step_key: str) -> Union[dict, dict]:
+    """ Loads the testdata (if not passed) and preprocesses it depending on step_key.
+    With stream_chunks (config.yaml) and no passed data, the tables are read and preprocessed chunkwise and are not loaded completely.
+
+    Parameters
+    ----------
+    dict_testdata: dict
+        Dictionary with testdata -> keys: table_names, values: job-ads (empty if the data still needs to be loaded)
+    step_key: str
+        String with the step_key to define which parts of the program need to be used (doc2vec or tfidf)
+
+    Returns
+    -------
+    dict_testdata: dict
+        Dictionary with testdata -> keys: table_names, values: job-ads (stays empty when streaming)
+    dict_testdata_prepro: dict
+        Dictionary with preprocessed testdata -> keys: table_names, values: TaggedDocuments (doc2vec) or Dict with unique_ids and OneStrings (tfidf) """
+    # Streaming: preprocess the testdata chunkwise, the tables are not loaded completely
+    if manage_dfs.stream_chunks and not dict_testdata:
+        return dict_testdata, stream_preprocess_data(connection_preparation.conn_testing(), step_key)
+    dict_testdata = load_testdata(dict_testdata)
+    return dict_testdata, preprocess_data(dict_testdata, step_key)
+
+def prepro_traindata(dict_traindata: dict, step_key: str) -> Union[dict, dict]:
+    """ Loads the trainingdata (if not passed) and preprocesses it depending on step_key.
+    With stream_chunks (config.yaml) and no passed data, the tables are read and preprocessed chunkwise and are not loaded completely.
+
+    Parameters
+    ----------
+    dict_traindata: dict
+        Dictionary with trainingdata -> keys: table_names, values: job-ads (empty if the data still needs to be loaded)
+    step_key: str
+        String with the step_key to define which parts of the program need to be used (doc2vec or tfidf)
+
+    Returns
+    -------
+    dict_traindata: dict
+        Dictionary with trainingdata -> keys: table_names, values: job-ads (stays empty when streaming)
+    dict_traindata_prepro: dict
+        Dictionary with preprocessed trainingdata -> keys: table_names, values: TaggedDocuments (doc2vec) or Dict with unique_ids and OneStrings (tfidf) """
+    # Streaming: preprocess the traindata chunkwise, the tables are not loaded completely
+    if manage_dfs.stream_chunks and not dict_traindata:
+        return dict_traindata, stream_preprocess_data(connection_preparation.conn_training(), step_key)
+    dict_traindata = load_traindata(dict_traindata)
+    return dict_traindata, preprocess_data(dict_traindata, step_key)
+
+def iter_prepro_chunks(conn: sqlite3.Connection, step_key: str) -> Iterator[Tuple[str, list or dict]]:
+    # Read only unique_id and full_text chunkwise and yield the preprocessed chunks
+    for name, chunk, chunk_prepro in preprocessing.preprocess_chunks(manage_dfs.iter_chunks(conn, 'unique_id, full_text'), step_key):
+        yield name, chunk_prepro
+
+def stream_preprocess_data(conn: sqlite3.Connection, step_key: str) -> dict:
+    dict_data_prepro = dict()
+    # Collect the preprocessed chunks per table (only the preprocessed data is kept, not the raw chunks)
+    for name, chunk_prepro in iter_prepro_chunks(conn, step_key):
+        if name not in dict_data_prepro:
+            logging.info(f'Preprocessing for table {name} started.')
+            dict_data_prepro[name] = chunk_prepro
+        elif isinstance(chunk_prepro, dict):
+            dict_data_prepro[name].update(chunk_prepro)
+        else:
+            dict_data_prepro[name].extend(chunk_prepro)
     return dict_data_prepro
\ No newline at end of file
@@ -1,7 +1,8 @@
 # *** Doc2Vec Modeling ***
-""" Script manages the three main steps in Doc2Vec modeling:
+""" Script manages the main steps in Doc2Vec modeling:
     	* Training
         * Retraining
+        * Compaction (only with --compact)
         * Sanity_check
     All steps can be called at once or repeated separately. 
     
@@ -12,8 +13,10 @@
 from . import training
 from . import retraining
 from . import sanity
+from . import compaction
 from gensim.models import doc2vec
 from pathlib import Path
+from datetime import datetime
 import yaml
 import logging
 import sys
@@ -28,12 +31,14 @@ with open(Path('config.yaml'), 'r') as yamlfile:
     model_paths = cfg['model_paths']
     model_path = model_paths['model_path']
     retrained_model_path = model_paths['retrained_model_path']
+    compact_model_path = model_paths['compact_model_path']
 
 # ## Functions
 def training_module(args: dict, dict_testdata: dict, dict_traindata: dict, step_key: str) -> None:
     """ training_module (manages all doc2vec-modeling related tasks)
             * Training
             * Retraining
+            * Compaction (lean model for the analysis: d2v_compact)
             * Sanity_check (adjust in config.yaml manually, which kind of model is evaluated (d2v_model_type))
 
     Parameters
@@ -65,13 +70,18 @@ def training_module(args: dict, dict_testdata: dict, dict_traindata: dict, step_
         logging.info('Retraining of the model for Doc2Vec started.')
         dict_testdata, dict_testdata_prepro = retraining.step_retrain_doc2vec(dict_testdata, step_key)
         logging.info('Retraining of the model for Doc2Vec finished.')
+    # Compaction
+    if method_args['compact'] == True:
+        logging.info('Compaction of a Doc2Vec-model started.')
+        compaction.compact_model()
+        logging.info('Compaction of a Doc2Vec-model finished.')
     # Sanity_Check
     if method_args['sanity_check'] == True:
         logging.info('Sanity_check of a Doc2Vec-model started.')
         sanity.step_sanity_check(dict_testdata, dict_traindata, dict_testdata_prepro, dict_traindata_prepro, step_key)
         logging.info('Sanity_check of a Doc2Vec-model finished.')
     # Training, Retraining, Sanity_Check
-    if method_args['training'] == False and method_args['retraining'] == False and method_args['sanity_check'] == False:
+    if method_args['training'] == False and method_args['retraining'] == False and method_args['sanity_check'] == False and method_args['compact'] == False:
         logging.info('Training of the model for Doc2Vec started.')
         dict_traindata, dict_traindata_prepro = training.step_train_doc2vec(dict_traindata, step_key)
         logging.info('Training of the model for Doc2Vec finished.')
@@ -85,17 +95,19 @@ def training_module(args: dict, dict_testdata: dict, dict_traindata: dict, step_
 # ## Support Functions
 """ Methods to load and save doc2vec-models from all parts of the program."""
 
-def save_model(model: doc2vec.Doc2Vec, name: str) -> None:
+def save_model(model: doc2vec.Doc2Vec, name: str, versioned: bool = False) -> None:
     """ Method saves a model depending on chosen name.
-    Doc2Vec has name options d2v_model or d2v_remodel. Can be modified in config.yaml.
+    Doc2Vec has name options d2v_model, d2v_remodel or d2v_compact. Can be modified in config.yaml.
     Paths are stored in config.yaml too.
         
     Parameters
     ----------
     name : str
-        Name of the model (or model-type). Value ajdustment in config.yaml: d2v_model or d2v_remodel 
+        Name of the model (or model-type). Value ajdustment in config.yaml: d2v_model, d2v_remodel or d2v_compact 
     model: doc2vec.Doc2Vec
-        The model to be saved. Type: gensim.models.doc2vec.Doc2Vec """
+        The model to be saved. Type: gensim.models.doc2vec.Doc2Vec 
+    versioned: bool
+        If True, an additional copy with a timestamp is saved next to the model (path_YYYYmmdd_HHMMSS). """
     
     def __saver(path: Path, model: doc2vec.Doc2Vec):
         if Path(path).exists():
@@ -103,6 +115,10 @@ def save_model(model: doc2vec.Doc2Vec, name: str) -> None:
             model.save(path)
         else:
             model.save(path)
+        if versioned == True:
+            version_path = f'{path}_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+            model.save(version_path)
+            logging.info(f'Model {name} is saved as version {version_path}.')
 
     # Training model
     if name == 'd2v_model':
@@ -112,19 +128,25 @@ def save_model(model: doc2vec.Doc2Vec, name: str) -> None:
     elif name == 'd2v_remodel':
         path = retrained_model_path
         __saver(path, model)
+    # Compact model
+    elif name == 'd2v_compact':
+        path = compact_model_path
+        __saver(path, model)
 
 # Load the model
-def load_model(name: str) -> doc2vec.Doc2Vec:
+def load_model(name: str, mmap: str = None) -> doc2vec.Doc2Vec:
     """ Method loads a model depending on chosen name.
-    Doc2Vec has name options d2v_model or d2v_remodel. Can be modified in config.yaml.
+    Doc2Vec has name options d2v_model, d2v_remodel or d2v_compact. Can be modified in config.yaml.
     Paths are stored in config.yaml too.
-        1. __loader: loads the model and excepts Exceptions
+        1. __loader: loads the model and excepts Exceptions (vectors of d2v_compact are converted for the use, see compaction.restore)
         2. __check_model: checks the received model 
 
     Parameters
     ----------
     name : str
-        Name of the model (or model-type). Value ajdustment in config.yaml: d2v_model or d2v_remodel 
+        Name of the model (or model-type). Value ajdustment in config.yaml: d2v_model, d2v_remodel or d2v_compact 
+    mmap: str
+        If 'r', the large arrays of the model are memory-mapped read-only (shared between processes) instead of loaded in memory.
     
     Raises
     ------
@@ -140,9 +162,11 @@ def load_model(name: str) -> doc2vec.Doc2Vec:
     def __loader(model: None, name: str):
         try:
             if name == 'd2v_model':
-                model = doc2vec.Doc2Vec.load(model_path)
+                model = doc2vec.Doc2Vec.load(model_path, mmap=mmap)
             elif name == 'd2v_remodel':
-                model = doc2vec.Doc2Vec.load(retrained_model_path)
+                model = doc2vec.Doc2Vec.load(retrained_model_path, mmap=mmap)
+            elif name == 'd2v_compact':
+                model = compaction.restore(doc2vec.Doc2Vec.load(compact_model_path, mmap=mmap))
         except FileNotFoundError:
             model = None
         return model
@@ -153,8 +177,8 @@ def load_model(name: str) -> doc2vec.Doc2Vec:
             logging.info(f'Model {name} is loaded and returned to processing step.')
             return model
         else:
-            logging.error(f'Model {name} failed to be loaded. Check Settings in config.yaml and paths {model_path}, {retrained_model_path}.')
-            print(f'Model {name} failed to be loaded. Check Settings in config.yaml and paths {model_path}, {retrained_model_path}.')
+            logging.error(f'Model {name} failed to be loaded. Check Settings in config.yaml and paths {model_path}, {retrained_model_path}, {compact_model_path}.')
+            print(f'Model {name} failed to be loaded. Check Settings in config.yaml and paths {model_path}, {retrained_model_path}, {compact_model_path}.')
             sys.exit(1)
     model = __check_model(model)
-    return model
\ No newline at end of file
+    return model
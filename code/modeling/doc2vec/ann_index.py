@@ -0,0 +1,156 @@
+# *** Doc2Vec - ANN-Index ***
+""" Script builds, saves, loads and searches an approximate nearest-neighbour index (IVF) over the docvecs of a Doc2Vec model.
+    * Build: The normalized docvecs are clustered with k-means (cosine) in n_lists lists. Each docvec is stored in the list of its nearest centroid.
+    * Search: For each query vector only the n_probe lists with the most similar centroids are scanned (instead of all docvecs).
+    More n_probe means higher recall but slower lookups (adjust in config.yaml: ann_index).
+    The index is saved next to the model and built after training and retraining:
+    <model_path>.ann.npz (centroids, offsets, tags and the fingerprint of the model) and <model_path>_ann_vectors.npy (normalized docvecs, loaded memory-mapped).
+    If the fingerprint does not match the saved model (e.g. retrained without build), the index is built again when it is loaded. """
+
+# ## Imports
+from modeling import doc2vec
+from modeling import registry
+from modeling.doc2vec.search import normalized_docvecs
+from gensim.models.doc2vec import Doc2Vec
+from services import vector_ops
+import numpy as np
+import scipy.sparse as sp
+import yaml
+from pathlib import Path
+import logging
+
+# ## Open Configuration-file and set parameters of the index
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    ann_params = cfg['ann_index']
+    build_after_training = ann_params['build']
+    n_lists = ann_params['n_lists']
+    n_probe = ann_params['n_probe']
+    iterations = ann_params['iterations']
+    train_size = ann_params['train_size']
+
+# Number of vectors assigned to the centroids at once (limits memory)
+BLOCK_SIZE = 65536
+
+# ## Functions
+def build_index(model: Doc2Vec, name: str) -> dict:
+    """ Builds the IVF-index over all docvecs of the passed model and saves it.
+
+    Parameters
+    ----------
+    model: Doc2Vec
+        The model with the docvecs to be indexed. Type: gensim.models.doc2vec.Doc2Vec
+    name : str
+        Name of the model (or model-type). Value ajdustment in config.yaml: d2v_model or d2v_remodel
+
+    Returns
+    -------
+    index: dict
+        Dictionary with the index: centroids, offsets of the lists, normalized vectors and tags (both sorted by list), fingerprint of the model """
+
+    vectors = normalized_docvecs(model)
+    tags = np.array([model.docvecs.index_to_doctag(i) for i in range(len(vectors))])
+    lists = n_lists if n_lists > 0 else int(np.sqrt(len(vectors)))
+    lists = max(1, min(lists, len(vectors)))
+    logging.info(f'ANN-Index for model {name} is built with {lists} lists over {len(vectors)} DocVecs.')
+
+    # Cluster the vectors (k-means on a sample) and assign every vector to its nearest centroid
+    centroids = __kmeans(vectors, lists)
+    assignment = __assign(vectors, centroids)
+    order = np.argsort(assignment, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=lists))))
+    index = {'centroids': centroids, 'offsets': offsets, 'vectors': vectors[order], 'tags': tags[order], 'fingerprint': registry.fingerprint(name)}
+
+    np.savez(index_path(name), centroids=index['centroids'], offsets=index['offsets'], tags=index['tags'], fingerprint=np.array(index['fingerprint']))
+    np.save(vectors_path(name), index['vectors'])
+    logging.info(f'ANN-Index for model {name} is saved in {index_path(name)}.')
+    return index
+
+def load_index(name: str) -> dict:
+    """ Loads the IVF-index of a model. If it does not exist or was built from another version of the model (fingerprint), it is built from the model.
+    The normalized vectors are memory-mapped (not loaded into memory).
+
+    Parameters
+    ----------
+    name : str
+        Name of the model (or model-type). Value ajdustment in config.yaml: d2v_model or d2v_remodel
+
+    Returns
+    -------
+    index: dict
+        Dictionary with the index: centroids, offsets of the lists, normalized vectors and tags (both sorted by list), fingerprint of the model """
+
+    path = index_path(name)
+    if not path.exists() or not vectors_path(name).exists():
+        logging.warning(f'ANN-Index for model {name} was not found in {path}. It will be built now.')
+        return build_index(registry.get(name), name)
+    with np.load(path) as saved:
+        index = {key: saved[key] for key in saved.files}
+    index['fingerprint'] = str(index['fingerprint']) if 'fingerprint' in index else None
+    if index['fingerprint'] != registry.fingerprint(name):
+        logging.warning(f'ANN-Index for model {name} was built from another version of the model. It will be built again.')
+        return build_index(registry.get(name), name)
+    index['vectors'] = np.load(vectors_path(name), mmap_mode='r')
+    logging.info(f'ANN-Index for model {name} is loaded.')
+    return index
+
+def search(index: dict, query_vectors: np.ndarray, topn: int = 10) -> list:
+    """ Finds the approximately most similar docvecs (cosine) for each query vector.
+
+    Parameters
+    ----------
+    index: dict
+        The IVF-index from build_index or load_index
+    query_vectors: np.ndarray
+        Matrix with one (inferred) vector per query
+    topn: int
+        Number of most similar docvecs per query
+
+    Returns
+    -------
+    results: list
+        One list per query with tuples (tag, cosine), sorted by cosine (like docvecs.most_similar) """
+
+    queries = vector_ops.normalize_rows(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+    centroids, offsets, vectors, tags = index['centroids'], index['offsets'], index['vectors'], index['tags']
+    probes = min(n_probe, len(centroids))
+    results = list()
+    for query, centroid_scores in zip(queries, queries @ centroids.T):
+        # scan only the lists of the n_probe most similar centroids
+        lists = np.argpartition(-centroid_scores, probes - 1)[:probes]
+        candidates = np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in lists])
+        scores = vectors[candidates] @ query
+        best = np.argpartition(-scores, topn - 1)[:topn] if len(scores) > topn else np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        results.append([(tags[candidates[i]].item(), float(scores[i])) for i in best])
+    return results
+
+def index_path(name: str) -> Path:
+    """ Path of the index, next to the model (adjust model paths in config.yaml). """
+    return Path(str(registry.model_path(name)) + '.ann.npz')
+
+def vectors_path(name: str) -> Path:
+    """ Path of the normalized vectors of the index (not <model_path>.*.npy, those files belong to the model fingerprint). """
+    return Path(str(registry.model_path(name)) + '_ann_vectors.npy')
+
+# k-means with cosine similarity, trained on a random sample of the vectors
+def __kmeans(vectors, lists):
+    random_state = np.random.RandomState(1)
+    sample = vectors[random_state.choice(len(vectors), min(len(vectors), max(train_size, lists)), replace=False)]
+    centroids = sample[random_state.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = __assign(sample, centroids)
+        members = sp.csr_matrix((np.ones(len(sample), dtype=np.float32), (assignment, np.arange(len(sample)))), shape=(lists, len(sample)))
+        sums = np.asarray(members @ sample)
+        # empty lists get a new random start vector
+        empty = np.flatnonzero(np.bincount(assignment, minlength=lists) == 0)
+        sums[empty] = sample[random_state.choice(len(sample), len(empty))]
+        centroids = vector_ops.normalize_rows(sums)
+    return centroids
+
+# Nearest centroid (highest cosine) for each vector
+def __assign(vectors, centroids):
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), BLOCK_SIZE):
+        assignment[start:start + BLOCK_SIZE] = np.argmax(vectors[start:start + BLOCK_SIZE] @ centroids.T, axis=1)
+    return assignment
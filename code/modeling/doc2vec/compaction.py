@@ -0,0 +1,133 @@
+# *** Doc2Vec Compaction ***
+""" Script compacts a Doc2Vec model to a lean model for the analysis (d2v_compact, path in config.yaml: compact_model_path).
+    * Vocab: words with less than min_count occurrences are removed (with their word vectors and weights).
+    * Vectors: docvecs, word vectors and weights are stored as float16 or int8 (with one scale per row).
+    * Training state which is not needed for infer_vector and most_similar is removed.
+    When the model is loaded, word vectors and weights are converted back to float32 (needed by infer_vector).
+    The docvecs stay float16 (memory-mapped if stored as float16), so the model needs less memory in every analysis process.
+    The compact model can not be retrained. Settings in config.yaml: compaction """
+
+# ## Imports
+from modeling import doc2vec
+from modeling import registry
+from modeling.doc2vec import ann_index
+from gensim.models.doc2vec import Doc2Vec
+import numpy as np
+import yaml
+from pathlib import Path
+import logging
+
+# ## Open Configuration-file and set parameters for the compaction
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    compaction_params = cfg['compaction']
+    source = compaction_params['source']
+    dtype = compaction_params['dtype']
+    min_count = compaction_params['min_count']
+
+# ## Functions
+def compact_model() -> None:
+    """ Method compacts the model set in config.yaml (compaction: source) with following steps:
+        - Load the model (d2v_model or d2v_remodel)
+        - Remove rare words from the vocab (min_count)
+        - Quantize docvecs, word vectors and weights (float16 or int8)
+        - Save the model as d2v_compact
+        - Build the ANN-Index over the docvecs (if set in config.yaml) """
+
+    # LOAD MODEL
+    source_fingerprint = registry.fingerprint(source)
+    model = doc2vec.load_model(source)
+    vocab_size = len(model.wv.vocab)
+
+    # PRUNE VOCAB
+    if model.hs:
+        logging.warning('The model uses hierarchical softmax, the vocab can not be pruned. Only the vectors are quantized.')
+    else:
+        __prune_vocab(model)
+    logging.info(f'Vocab was pruned from {vocab_size} to {len(model.wv.vocab)} words (min_count {min_count}).')
+
+    # REMOVE TRAINING STATE AND QUANTIZE VECTORS
+    model.trainables.vectors_docs_lockf = np.ones(0, dtype=np.float32)
+    model.docvecs.vectors_docs_norm = None
+    model.wv.vectors_norm = None
+    model.compact_scales = dict()
+    for key, owner, attribute in __quantized_arrays(model):
+        values, scale = __quantize(getattr(owner, attribute))
+        setattr(owner, attribute, values)
+        if scale is not None:
+            model.compact_scales[key] = scale
+    logging.info(f'Vectors of the model were quantized to {dtype}.')
+
+    # SAVE MODEL
+    registry.save(model, 'd2v_compact', {'mode': 'compaction', 'source': source, 'source_fingerprint': source_fingerprint, 'dtype': dtype, 'min_count': min_count,
+                'documents': len(model.docvecs), 'vocab_size': len(model.wv.vocab), 'vocab_size_source': vocab_size})
+    # the registry keeps the saved model for this process, so it is converted for the use as well
+    restore(model)
+
+    # BUILD ANN-INDEX
+    if ann_index.build_after_training == True:
+        ann_index.build_index(model, 'd2v_compact')
+
+def restore(model: Doc2Vec) -> Doc2Vec:
+    """ Converts the vectors of a loaded compact model for the use: word vectors and weights to float32, docvecs to float16.
+
+    Parameters
+    ----------
+    model: Doc2Vec
+        The loaded compact model. Type: gensim.models.doc2vec.Doc2Vec
+
+    Returns
+    -------
+    model: Doc2Vec
+        The same model with converted vectors """
+
+    scales = getattr(model, 'compact_scales', dict())
+    for key, owner, attribute in __quantized_arrays(model):
+        target = np.float16 if key == 'docvecs' else np.float32
+        setattr(owner, attribute, __dequantize(getattr(owner, attribute), scales.get(key), target))
+    model.compact_scales = dict()
+    return model
+
+# ## Private Functions
+
+# Arrays to be quantized: (key, object, attribute)
+def __quantized_arrays(model):
+    arrays = [('docvecs', model.docvecs, 'vectors_docs'), ('wv', model.wv, 'vectors')]
+    for attribute in ('syn1neg', 'syn1'):
+        if hasattr(model.trainables, attribute):
+            arrays.append((attribute, model.trainables, attribute))
+    return arrays
+
+# Remove the words with less than min_count occurrences (the order of the vocab stays the same)
+def __prune_vocab(model):
+    words = [word for word in model.wv.index2word if model.wv.vocab[word].count >= min_count]
+    if len(words) == len(model.wv.index2word):
+        return
+    positions = np.array([model.wv.vocab[word].index for word in words], dtype=np.int64)
+    model.wv.vectors = model.wv.vectors[positions]
+    model.trainables.vectors_lockf = model.trainables.vectors_lockf[positions]
+    if model.negative:
+        model.trainables.syn1neg = model.trainables.syn1neg[positions]
+    vocab = {word: model.wv.vocab[word] for word in words}
+    for index, word in enumerate(words):
+        vocab[word].index = index
+    model.wv.vocab = vocab
+    model.wv.index2word = words
+    if model.negative:
+        model.vocabulary.make_cum_table(model.wv)
+
+# float16: cast, int8: one scale per row (max. absolute value / 127)
+def __quantize(values):
+    values = np.asarray(values, dtype=np.float32)
+    if dtype == 'int8':
+        scale = np.abs(values).max(axis=1) / 127 if len(values) else np.ones(0, dtype=np.float32)
+        scale = np.where(scale > 0, scale, 1).astype(np.float32)
+        return np.round(values / scale[:, None]).astype(np.int8), scale
+    return values.astype(np.float16), None
+
+def __dequantize(values, scale, target):
+    if scale is not None:
+        return (values.astype(np.float32) * scale[:, None]).astype(target)
+    if values.dtype == target:
+        return values
+    return values.astype(target)
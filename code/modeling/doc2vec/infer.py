@@ -0,0 +1,79 @@
+# *** Doc2Vec - Infer vectors ***
+""" Script infers the vectors of many documents at once with a Doc2Vec-model.
+    The documents are split in chunks and inferred by several worker processes, each worker loads the model once.
+    The model is loaded memory-mapped (mmap='r'), so the vectors are shared between the processes (copy-on-write) instead of copied into each one.
+    The vectors are returned in one float32 matrix (one row per document, same order as the input).
+    Documents already inferred with the same model are taken from the vector_store (config.yaml) and not inferred again. """
+
+# ## Imports
+from modeling import registry
+from services import vector_store
+from multiprocessing import Pool
+import numpy as np
+import yaml
+from pathlib import Path
+import logging
+
+# ## Open Configuration-file and set number of worker processes
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    d2v_params = cfg['doc2vec_model']
+    infer_workers = d2v_params['infer_workers']
+
+# Number of documents per task passed to a worker
+CHUNK_SIZE = 500
+
+# ## Functions
+def infer_vectors(name: str, docs: list, texts: list = None) -> np.ndarray:
+    """ Infers the vectors for all passed documents.
+
+    Parameters
+    ----------
+    name: str
+        Name of the model (or model-type). Value ajdustment in config.yaml: d2v_model or d2v_remodel
+    docs: list
+        List with the tokenized documents (one list of tokens per document)
+    texts: list
+        Preprocessed texts (OneStrings) of docs, used as key in the vector_store. If None, they are joined from docs.
+
+    Returns
+    -------
+    vectors: np.ndarray
+        Matrix (float32) with one inferred vector per document, same order as docs. """
+
+    if vector_store.active != True:
+        return __infer_parallel(name, docs)
+    # Only infer documents which are not in the vector_store yet (fingerprint and texts are only needed as its key)
+    texts = [' '.join(words) for words in docs] if texts is None else texts
+    vectors = vector_store.cached_dense(registry.fingerprint(name), texts, lambda positions: __infer_parallel(name, [docs[position] for position in positions]))
+    return vectors
+
+# Infer the documents in chunks by several worker processes
+def __infer_parallel(name, docs):
+    chunks = [docs[start:start + CHUNK_SIZE] for start in range(0, len(docs), CHUNK_SIZE)]
+    logging.info(f'{len(docs)} documents are inferred with model {name} in {len(chunks)} chunks by {max(infer_workers, 1)} process(es).')
+    # Small inputs or one worker: infer in this process
+    if infer_workers <= 1 or len(chunks) <= 1:
+        __init_worker(name)
+        results = [__infer_chunk((name, chunk)) for chunk in chunks]
+    else:
+        with Pool(processes=min(infer_workers, len(chunks)), initializer=__init_worker, initargs=(name,)) as pool:
+            results = pool.map(__infer_chunk, [(name, chunk) for chunk in chunks])
+
+    if not results:
+        return np.empty((0, registry.get(name).vector_size), dtype=np.float32)
+    vectors = np.vstack(results)
+    return vectors
+
+# Load the model once per process (registry: memory-mapped, read only)
+def __init_worker(name):
+    registry.get(name)
+
+# Infer one chunk of documents with the default parameters of the model (same as similarity_unseen_docs)
+def __infer_chunk(task):
+    name, chunk = task
+    model = registry.get(name)
+    vectors = np.empty((len(chunk), model.vector_size), dtype=np.float32)
+    for row, words in enumerate(chunk):
+        vectors[row] = model.infer_vector(words)
+    return vectors
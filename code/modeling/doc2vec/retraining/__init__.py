@@ -37,10 +37,8 @@ def step_retrain_doc2vec(dict_testdata: dict, step_key: str) -> Union[dict, dict
     dict_testdata_prepro: dict
         Dictionary with testdata -> keys: table_names, values: Dict(keys: uid, values: preprocessed and tagged token) """
 
-    # Load Testdata (if not already loaded)
-    dict_testdata = modeling.load_testdata(dict_testdata)
-    # Preprocess Testdata (return TaggedDocument object saved in dict)
-    dict_testdata_prepro = modeling.preprocess_data(dict_testdata, step_key)
+    # Load Testdata (if not already loaded) and preprocess it (return TaggedDocument object saved in dict)
+    dict_testdata, dict_testdata_prepro = modeling.prepro_testdata(dict_testdata, step_key)
     # Retrain the data
     doc2vec_retrain.retrain_data(dict_testdata_prepro)
     
@@ -1,18 +1,37 @@
 # *** Doc2Vec Retraining***
-""" Script retrains a Doc2Vec model."""
+""" Script retrains a Doc2Vec model incrementally:
+    Only the new documents (unique_ids not yet in the model) and their new words are trained, the existing docvecs and word vectors stay unchanged.
+    With negative sampling the output weights (syn1neg) of the existing words are restored after each epoch, so they stay unchanged as well.
+    With hierarchical softmax the output weights (syn1) are trained further: the Huffman tree is built again with the new words, so the old weights do not fit anymore.
+    The latest retrained model is the base (if it does not exist, the trained model), so the model can be refreshed again and again.
+    Each retrained model is saved as d2v_remodel and as a versioned copy. """
 
 # ## Imports
 from modeling import doc2vec
+from modeling import registry
+from modeling.doc2vec import ann_index
+from gensim.models.callbacks import CallbackAny2Vec
+import numpy as np
+import itertools
+import sys
+import yaml
+from pathlib import Path
 import logging
 
+# ## Open Configuration-file and set parameters for retraining
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    retrain_epochs = cfg['doc2vec_model']['retrain_epochs']
+
 # ## Functions
 def retrain_data(dict_testdata_prepro: dict):
-    """ Method retrains a given Doc2Vec model and infers new vocab:
-        - No parameter setting needed, uses old parameters (saved in model)
-        - Load old model (to be updated)
-        - Update Vocab with new Testdata
-        - (Re)train the model
-        - Save the model 
+    """ Method retrains a given Doc2Vec model with new documents:
+        - No parameter setting needed, uses old parameters (saved in model), only the epochs for retraining are set in config.yaml (retrain_epochs)
+        - Load old model (to be updated): latest d2v_remodel or d2v_model
+        - Update Vocab with the new documents (keep the existing docvecs)
+        - Train only the new documents and new words
+        - Save the model (latest and versioned copy)
+        - Build the ANN-Index over the docvecs (if set in config.yaml)
 
     Parameters
     ----------
@@ -20,15 +39,72 @@ def retrain_data(dict_testdata_prepro: dict):
         Dictionary with testdata -> keys: table_names, values: Dict(keys: uid, values: preprocessed and tagged token) """
     
     # LOAD OLD MODEL
-    model = doc2vec.load_model("d2v_model")
+    base_name = 'd2v_remodel' if Path(doc2vec.retrained_model_path).exists() else 'd2v_model'
+    base_fingerprint = registry.fingerprint(base_name)
+    model = doc2vec.load_model(base_name)
+    logging.info(f'Model {base_name} is the base for the retraining.')
 
-    # UPDATE VOCAB WITH NEW DATA
-    data_retrain = sum(dict_testdata_prepro.values(), [])
-    model.build_vocab(data_retrain, update=True) # update your vocab
-    
-    # RETRAIN THE MODEL
-    model.train
+    # SELECT NEW DOCUMENTS (unique_ids not yet in the model)
+    old_tags = [model.docvecs.index_to_doctag(i) for i in range(len(model.docvecs.vectors_docs))]
+    known_tags = set(old_tags)
+    data_retrain = [item for item in itertools.chain.from_iterable(dict_testdata_prepro.values()) if item.tags[0] not in known_tags]
+    if not data_retrain:
+        logging.warning('All documents are already part of the model. Retraining is skipped.')
+        return
+    logging.info(f'{len(data_retrain)} new documents are added to the model with {len(old_tags)} DocVecs.')
+
+    # UPDATE VOCAB WITH NEW DATA (build_vocab appends the new tags to offset2doctag/doctags, the docvecs are extended here)
+    old_vectors = model.docvecs.vectors_docs
+    old_words = len(model.wv.index2word)
+    model.build_vocab(data_retrain, update=True)
+    __extend_docvecs(model, old_vectors)
+    __check_docvecs(model, old_tags, list(dict.fromkeys(item.tags[0] for item in data_retrain)))
+
+    # RETRAIN THE MODEL (only the new documents; the existing word vectors and docvecs are locked, the output weights of the existing words are restored)
+    model.trainables.vectors_lockf[:old_words] = 0.0
+    model.train(data_retrain, total_examples=len(data_retrain), epochs=retrain_epochs, callbacks=[__FreezeOutputWeights(model, old_words)])
+    model.trainables.vectors_lockf[:] = 1.0
+    model.trainables.vectors_docs_lockf[:] = 1.0
     logging.info(f'For the model {len(model.docvecs)} DocVecs were computed.')
  
     # SAVE MODEL
-    doc2vec.save_model(model, "d2v_remodel")
\ No newline at end of file
+    registry.save(model, 'd2v_remodel', {'mode': 'retraining', 'base': base_name, 'base_fingerprint': base_fingerprint, 'epochs': retrain_epochs,
+                'new_documents': len(data_retrain), 'documents': len(model.docvecs), 'vocab_size': len(model.wv.vocab)}, versioned=True)
+
+    # BUILD ANN-INDEX
+    if ann_index.build_after_training == True:
+        ann_index.build_index(model, 'd2v_remodel')
+
+# gensim has no lockf for the output weights (syn1neg): the rows of the existing words are copied before and restored after each epoch
+class __FreezeOutputWeights(CallbackAny2Vec):
+    def __init__(self, model, old_words):
+        self.old_words = old_words
+        self.syn1neg = model.trainables.syn1neg[:old_words].copy() if model.negative else None
+
+    def on_epoch_end(self, model):
+        if self.syn1neg is not None:
+            model.trainables.syn1neg[:self.old_words] = self.syn1neg
+
+# Add one docvec per new tag behind the old docvecs, seeded like reset_doc_weights; only the new docvecs are trained (lockf)
+def __extend_docvecs(model, old_vectors):
+    n_old = len(old_vectors)
+    new_tags = model.docvecs.offset2doctag[n_old:]
+    new_vectors = np.empty((len(new_tags), model.docvecs.vector_size), dtype=old_vectors.dtype)
+    for row, tag in enumerate(new_tags):
+        new_vectors[row] = model.trainables.seeded_vector('%d %s' % (model.trainables.seed, tag), model.docvecs.vector_size)
+    model.docvecs.vectors_docs = np.vstack((old_vectors, new_vectors))
+    model.docvecs.vectors_docs_norm = None
+    lockf = np.ones(n_old + len(new_tags), dtype=np.float32)
+    lockf[:n_old] = 0.0
+    model.trainables.vectors_docs_lockf = lockf
+
+# Every old tag keeps its docvec and every new tag has its own new docvec (offsets behind the old ones)
+def __check_docvecs(model, old_tags, new_tags):
+    expected = len(old_tags) + len(new_tags)
+    old_offsets = [model.docvecs.doctags[tag].offset for tag in old_tags]
+    new_offsets = sorted(model.docvecs.doctags[tag].offset for tag in new_tags if tag in model.docvecs.doctags)
+    if len(model.docvecs) != expected or len(model.docvecs.vectors_docs) != expected or len(model.trainables.vectors_docs_lockf) != expected \
+            or old_offsets != list(range(len(old_tags))) or new_offsets != list(range(len(old_tags), expected)):
+        logging.error(f'DocVecs of the retrained model are inconsistent: expected {expected} DocVecs ({len(old_tags)} old, {len(new_tags)} new), model has {len(model.docvecs)}.')
+        print(f'DocVecs of the retrained model are inconsistent: expected {expected} DocVecs ({len(old_tags)} old, {len(new_tags)} new), model has {len(model.docvecs)}.')
+        sys.exit(1)
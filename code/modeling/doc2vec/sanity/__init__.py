@@ -48,12 +48,10 @@ def step_sanity_check(dict_testdata: dict, dict_traindata: dict, dict_testdata_p
     
 # Manage Loading and Preprocessing of Testdata
 def __get_testdata(dict_testdata, dict_testdata_prepro, step_key):
-    dict_testdata = modeling.load_testdata(dict_testdata)
-    dict_testdata_prepro = modeling.preprocess_data(dict_testdata, step_key)
+    dict_testdata, dict_testdata_prepro = modeling.prepro_testdata(dict_testdata, step_key)
     return dict_testdata_prepro
 
 # Manage Loading and Preprocessing of Testdata
 def __get_traindata(dict_traindata, dict_traindata_prepro, step_key):
-    dict_traindata = modeling.load_traindata(dict_traindata)
-    dict_traindata_prepro = modeling.preprocess_data(dict_traindata, step_key)
+    dict_traindata, dict_traindata_prepro = modeling.prepro_traindata(dict_traindata, step_key)
     return dict_traindata_prepro
\ No newline at end of file
@@ -13,7 +13,10 @@ import os
 from nltk.corpus import stopwords 
 import collections
 import random
-from modeling import doc2vec
+from modeling import registry
+from modeling.doc2vec import infer, search
+from scipy.stats import norm
+import math
 import yaml 
 from pathlib import Path
 import logging
@@ -26,13 +29,21 @@ with open(Path("config.yaml"), "r") as yamlfile:
     cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
     d2v_model_type = cfg['d2v_model_type']
     d2v_type = d2v_model_type['type']
+    sanity_params = cfg['sanity_check']
+    sample_size = sanity_params['sample_size']
+    seed = sanity_params['seed']
+    confidence = sanity_params['confidence']
+
+# Number of most similar documents per check (like docvecs.most_similar)
+TOPN = 10
 
 # ## Functions
 def start_sanity_check(dict_traindata_prepro: dict) -> None:
     """ 1. sanity_check (checks if data finds itself as most similar)
-            - iterate over each training-datapiece and infer it in the model
-            - check the most_similar job-ads and store the ranking in ranks (has one datapiece1 itself as the most_similar (in Top 10) in the model?)
-            - log a sample and the counting result in logger.log
+            - draw a sample of the training-data, stratified by table (sample_size in config.yaml, 0 = all documents)
+            - infer the sample in the model (batched) and get the most_similar job-ads for all of them at once (batched)
+            - check the ranking in ranks (has one datapiece1 itself as the most_similar (in Top 10) in the model?)
+            - log a sample and the counting result with confidence intervals (Wilson) in logger.log
 
     Parameters
     ----------
@@ -42,31 +53,38 @@ def start_sanity_check(dict_traindata_prepro: dict) -> None:
     # load the model to be checked once
     d2v_model = __envoke_model()
 
-    # ## Set Variables
-    ranks = list()
-    counter = 0
-    
+    # SAMPLE THE TRAINDATA (stratified by table)
+    sample = __stratified_sample(dict_traindata_prepro)
+    if not sample:
+        logging.warning('No training data for the Sanity_Check, ranks are not computed.')
+        return
+    logging.info(f'{len(sample)} documents of {sum(len(train_corpus) for train_corpus in dict_traindata_prepro.values())} are now infered in the model and checked for most_similar uids.')
+
     # CHECK MOST_SIMILAR
-    for name, train_corpus in dict_traindata_prepro.items():
-        logging.info(f'Table {name} is now infered in itself and checked for most_similar uids.')
-        for item in train_corpus:
-            # infer text in model and get most_similar back
-            sims = d2v_model.docvecs.most_similar([d2v_model.infer_vector(item.words)])
-            counter += 1
-            try:
-                # check if uid of item (item.tags[0]) is in the list sims (most_similar top10)
-                rank = [docid for docid, sim in sims].index(item.tags[0])
-                ranks.append(rank)
-            except:
-                # item does not find itself in the most_similar Top10
-                continue
+    # infer texts in model and get most_similar (Top10) back, both batched
+    vectors = infer.infer_vectors(d2v_type, [item.words for name, item in sample])
+    sims_list = search.most_similar_batch(d2v_model, vectors, topn=TOPN)
+    ranks = list()
+    for (name, item), sims in zip(sample, sims_list):
+        # check if uid of item (item.tags[0]) is in the list sims (most_similar top10)
+        ranked_ids = [docid for docid, sim in sims]
+        if item.tags[0] in ranked_ids:
+            ranks.append(ranked_ids.index(item.tags[0]))
 
     # log example from data (most, second-most, median, least)-similar texts for item
-    __give_example(item, sims, train_corpus)
+    name, item = sample[-1]
+    __give_example(item, sims_list[-1], dict_traindata_prepro[name])
 
     # log ranks e.g.: Counter({1: 6, 0: 6, 2: 3, 3: 2, 5: 1, 6: 1, 9: 1}) (position 1: are 6 docs -> means: 6 documents found themselfs as most_similar)
-    logging.info(f'In model {d2v_model} {counter} documents were infered. Ranks for most_similar Top10: {collections.Counter(ranks)}')
- 
+    counter = len(sample)
+    rank_counter = collections.Counter(ranks)
+    logging.info(f'In model {d2v_model} {counter} documents were infered. Ranks for most_similar Top10: {rank_counter}')
+    # share of the documents per rank with confidence interval (the sample stands for all training data)
+    for rank, count in sorted(rank_counter.items()):
+        lower, upper = __wilson_interval(count, counter)
+        logging.info(f'Rank {rank}: {count}/{counter} documents ({count / counter:.1%}), {confidence:.0%}-confidence interval: {lower:.1%} - {upper:.1%}')
+    lower, upper = __wilson_interval(len(ranks), counter)
+    logging.info(f'In Top{TOPN}: {len(ranks)}/{counter} documents ({len(ranks) / counter:.1%}), {confidence:.0%}-confidence interval: {lower:.1%} - {upper:.1%}')
 
 def evaluate_sample(dict_testdata_prepro: dict, dict_traindata_prepro: dict) -> None:
     """ 2. evaluate_sample (gives random sample for evaluation)
@@ -119,9 +137,33 @@ def __envoke_model():
     global d2v_model
     if d2v_model is None:
         # decide which one to use (d2v_model or d2v_remodel) depends on function (change in config!)
-        d2v_model = doc2vec.load_model(d2v_type)
+        d2v_model = registry.get(d2v_type)
     return d2v_model
 
+# Sample of the documents, each table gets its share of sample_size (all documents if sample_size is 0 or bigger than the data)
+def __stratified_sample(dict_traindata_prepro):
+    total = sum(len(train_corpus) for train_corpus in dict_traindata_prepro.values())
+    random_state = random.Random(seed)
+    sample = list()
+    for name, train_corpus in dict_traindata_prepro.items():
+        train_corpus = list(train_corpus)
+        if sample_size <= 0 or sample_size >= total:
+            positions = range(len(train_corpus))
+        else:
+            size = min(len(train_corpus), max(1, round(sample_size * len(train_corpus) / total)))
+            positions = sorted(random_state.sample(range(len(train_corpus)), size))
+        sample.extend((name, train_corpus[position]) for position in positions)
+    return sample
+
+# Wilson score interval for the share count/n
+def __wilson_interval(count, n):
+    z = float(norm.ppf(1 - (1 - confidence) / 2))
+    share = count / n
+    denominator = 1 + z**2 / n
+    center = (share + z**2 / (2 * n)) / denominator
+    margin = z * math.sqrt(share * (1 - share) / n + z**2 / (4 * n**2)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
 def __give_example(item, sims, train_corpus):
     """ Log most-similar, second-most, median and least documents (uid and text) for one document."""
     logging.info(u'SIMILAR/DISSIMILAR DOCS PER MODEL %s:' % d2v_model)
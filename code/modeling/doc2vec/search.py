@@ -0,0 +1,77 @@
+# *** Doc2Vec - Batched most_similar ***
+""" Script finds the most similar docvecs of a Doc2Vec model for many query vectors at once (exact search).
+    The docvecs are normalized once per model (normalized_docvecs, kept in docvecs.vectors_docs_norm like init_sims), the query vectors are compared in blocks (block_size in config.yaml) with one matrix product
+    and the topn of each query are selected with argpartition. Gives the same results as docvecs.most_similar([vector]) per query. """
+
+# ## Imports
+from gensim.models.doc2vec import Doc2Vec
+from services import vector_ops
+import numpy as np
+import yaml
+from pathlib import Path
+import logging
+
+# ## Open Configuration-file and set block size
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    block_size = cfg['most_similar']['block_size']
+
+# ## Functions
+def normalized_docvecs(model: Doc2Vec) -> np.ndarray:
+    """ Normalized docvecs (float32) of the model. They are computed once (in blocks, limits memory) and kept in docvecs.vectors_docs_norm,
+    so all consumers of the same model (registry.get) reuse them, gensim's docvecs.most_similar as well. Training, retraining and compaction reset them to None.
+
+    Parameters
+    ----------
+    model: Doc2Vec
+        The model with the docvecs. Type: gensim.models.doc2vec.Doc2Vec
+
+    Returns
+    -------
+    docvecs: np.ndarray
+        Matrix with the normalized docvecs (same order as docvecs.vectors_docs) """
+
+    if getattr(model.docvecs, 'vectors_docs_norm', None) is None:
+        vectors = model.docvecs.vectors_docs
+        normalized = np.empty(vectors.shape, dtype=np.float32)
+        for start in range(0, len(vectors), vector_ops.BLOCK_SIZE):
+            normalized[start:start + vector_ops.BLOCK_SIZE] = vector_ops.normalize_rows(np.asarray(vectors[start:start + vector_ops.BLOCK_SIZE], dtype=np.float32))
+        model.docvecs.vectors_docs_norm = normalized
+    return model.docvecs.vectors_docs_norm
+
+def most_similar_batch(model: Doc2Vec, query_vectors: np.ndarray, topn: int = 10) -> list:
+    """ Finds the most similar docvecs (cosine) for each query vector.
+
+    Parameters
+    ----------
+    model: Doc2Vec
+        The model with the docvecs to be searched. Type: gensim.models.doc2vec.Doc2Vec
+    query_vectors: np.ndarray
+        Matrix with one (inferred) vector per query
+    topn: int
+        Number of most similar docvecs per query
+
+    Returns
+    -------
+    results: list
+        One list per query with tuples (tag, cosine), sorted by cosine (like docvecs.most_similar) """
+
+    docvecs = normalized_docvecs(model)
+    queries = vector_ops.normalize_rows(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+    topn = min(topn, len(docvecs))
+    if topn == 0:
+        return [list() for _ in queries]
+    logging.info(f'most_similar for {len(queries)} vectors is computed in blocks of {block_size} over {len(docvecs)} DocVecs.')
+
+    results = list()
+    for start in range(0, len(queries), block_size):
+        # Cosine of the query block with all docvecs (one matrix product)
+        cosine_block = queries[start:start + block_size] @ docvecs.T
+        # Get the topn per row and sort them by cosine
+        best = np.argpartition(-cosine_block, topn - 1, axis=1)[:, :topn] if topn < len(docvecs) else np.tile(np.arange(len(docvecs)), (len(cosine_block), 1))
+        best_scores = np.take_along_axis(cosine_block, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best, best_scores = np.take_along_axis(best, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+        for positions, scores in zip(best, best_scores):
+            results.append([(model.docvecs.index_to_doctag(position), float(score)) for position, score in zip(positions, scores)])
+    return results
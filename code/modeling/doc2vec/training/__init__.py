@@ -5,17 +5,27 @@
     2. Preprocess Data
         * Pass data to Preprocessing and get a Dictionary with TaggedDocument Objects in return.
     3. Pass preprocessed Data to Training
-        * Pass preprocessed data to Training."""
+        * Pass preprocessed data to Training.
+    With corpus_file: true (config.yaml) the preprocessed data is streamed in a corpus file and the model is trained from the file."""
 
 # ## Imports
 from . import doc2vec_train
+from services import connection_preparation
 from typing import Union
+from pathlib import Path
+import itertools
+import yaml
 import modeling
 
 # ## Define and Set Variables
 dict_traindata = dict()
 dict_traindata_prepro = dict()
 
+# ## Open Configuration-file and set training mode
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    corpus_file = cfg['doc2vec_model']['corpus_file']
+
 # ## Functions
 def step_train_doc2vec(dict_traindata: dict, step_key: str) -> Union[dict, dict]:
     """ Manages Loading and Preprocessing of data. Passes preprocessed data to Training.
@@ -34,10 +44,18 @@ def step_train_doc2vec(dict_traindata: dict, step_key: str) -> Union[dict, dict]
     dict_traindata_prepro: dict
         Dictionary with trainingdata -> keys: table_names, values: Dict(keys: uid, values: preprocessed and tagged token) """
     
-    # Load Traindata (if not already loaded)
-    dict_traindata = modeling.load_traindata(dict_traindata)
-    # Preprocess Traindata (return TaggedDocument object saved in dict)
-    dict_traindata_prepro = modeling.preprocess_data(dict_traindata, step_key)
+    # Corpus_file-mode: stream the traindata chunkwise in the corpus file (preprocessed data is not kept, later steps reload it)
+    if corpus_file == True:
+        if not dict_traindata:
+            chunks = modeling.iter_prepro_chunks(connection_preparation.conn_training(), step_key)
+            doc2vec_train.train_corpus_file(itertools.chain.from_iterable(chunk_prepro for name, chunk_prepro in chunks))
+            return dict_traindata, dict()
+        dict_traindata, dict_traindata_prepro = modeling.prepro_traindata(dict_traindata, step_key)
+        doc2vec_train.train_corpus_file(itertools.chain.from_iterable(dict_traindata_prepro.values()))
+        return dict_traindata, dict_traindata_prepro
+
+    # Load Traindata (if not already loaded) and preprocess it (return TaggedDocument object saved in dict)
+    dict_traindata, dict_traindata_prepro = modeling.prepro_traindata(dict_traindata, step_key)
     # Train the data
     doc2vec_train.train_data(dict_traindata_prepro)
 
@@ -1,25 +1,35 @@
 # *** Doc2Vec Training***
-""" Script trains a Doc2Vec model."""
+""" Script trains a Doc2Vec model.
+    * train_data: trains with the preprocessed data in memory.
+    * train_corpus_file: streams the preprocessed data in a corpus file and trains from the file (corpus_file-mode), 
+      the corpus is never completely in memory. The docvecs are tagged with the unique_ids afterwards."""
 
 # ## Imports
 import gensim
+from gensim.models.doc2vec import Doctag
 from pathlib import Path
+from typing import Iterable
+import itertools
 import yaml
 from modeling import doc2vec
+from modeling import registry
+from modeling.doc2vec import ann_index
 import logging
 
 # ## Open Configuration-file and set parameter for model to be trained
 with open(Path('config.yaml'), 'r') as yamlfile:
     cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
     params = cfg['doc2vec_model']
+    corpus_path = Path(cfg['temp_paths']['d2v_corpus_path'])
 
 # ## Functions
 def train_data(dict_traindata_prepro: dict):
     """ Method trains a Doc2Vec model with following steps: 
-        - Set Parameter for model: (vector_size=100, min_count=1, epochs=25, alpha=0.025) (modification in config.yaml)
+        - Set Parameter for model: (vector_size=100, min_count=1, epochs=25, alpha=0.025, workers=4) (modification in config.yaml)
         - Build Vocab with traindata (preprocessed)
         - Train the model
         - Save the model 
+        - Build the ANN-Index over the docvecs (if set in config.yaml)
     
     Parameters
     ----------
@@ -27,11 +37,11 @@ def train_data(dict_traindata_prepro: dict):
         Dictionary with trainingdata -> keys: table_names, values: Dict(keys: uid, values: preprocessed and tagged token) """
 
     # SET PARAMETER FOR MODEL
-    model = gensim.models.doc2vec.Doc2Vec(vector_size=params['vector_size'], min_count=params['min_count'], epochs=params['epochs'], alpha=params['alpha'])
+    model = gensim.models.doc2vec.Doc2Vec(vector_size=params['vector_size'], min_count=params['min_count'], epochs=params['epochs'], alpha=params['alpha'], workers=params['workers'])
     logging.info(f'Model Settings: {model}')
 
     # BUILD VOCAB WITH TRAINDATA
-    data = sum(dict_traindata_prepro.values(), [])
+    data = list(itertools.chain.from_iterable(dict_traindata_prepro.values()))
     model.build_vocab(data)
     logging.info('Vocab was builded.')
 
@@ -40,4 +50,71 @@ def train_data(dict_traindata_prepro: dict):
     logging.info(f'For the model {len(model.docvecs)} DocVecs were computed.')
     
     # SAVE MODEL
-    doc2vec.save_model(model, 'd2v_model')
\ No newline at end of file
+    registry.save(model, 'd2v_model', __metadata(model, 'training'))
+
+    # BUILD ANN-INDEX
+    if ann_index.build_after_training == True:
+        ann_index.build_index(model, 'd2v_model')
+
+def train_corpus_file(documents: Iterable[gensim.models.doc2vec.TaggedDocument]):
+    """ Method trains a Doc2Vec model from a corpus file with following steps: 
+        - Write the preprocessed documents line by line in the corpus file (path in config.yaml: d2v_corpus_path)
+        - Set Parameter for model and train it from the corpus file with workers threads (modification in config.yaml)
+        - Tag the docvecs with the unique_ids (in the corpus file the documents are tagged with their line number)
+        - Save the model 
+        - Build the ANN-Index over the docvecs (if set in config.yaml)
+
+    Parameters
+    ----------
+    documents: Iterable[gensim.models.doc2vec.TaggedDocument]
+        Preprocessed and tagged traindata, e.g. streamed chunk by chunk (modeling.iter_prepro_chunks) """
+
+    # WRITE CORPUS FILE (one document per line, tokens separated by spaces)
+    tags, word_counts = __write_corpus(documents)
+    logging.info(f'{len(tags)} documents were written in corpus file {corpus_path}.')
+
+    # SET PARAMETER FOR MODEL, BUILD VOCAB AND TRAIN THE MODEL
+    model = gensim.models.doc2vec.Doc2Vec(corpus_file=str(corpus_path), vector_size=params['vector_size'], min_count=params['min_count'], 
+                epochs=params['epochs'], alpha=params['alpha'], workers=params['workers'])
+    logging.info(f'Model Settings: {model}')
+
+    # TAG DOCVECS WITH UNIQUE_IDS
+    __retag_docvecs(model, tags, word_counts)
+    logging.info(f'For the model {len(model.docvecs)} DocVecs were computed.')
+
+    # SAVE MODEL
+    registry.save(model, 'd2v_model', __metadata(model, 'corpus_file'))
+
+    # BUILD ANN-INDEX
+    if ann_index.build_after_training == True:
+        ann_index.build_index(model, 'd2v_model')
+
+# Write the documents in the corpus file, documents without tokens are skipped (they would be no line in corpus_file-mode)
+def __write_corpus(documents):
+    tags = list()
+    word_counts = list()
+    skipped = 0
+    corpus_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(corpus_path, 'w', encoding='utf-8') as corpus:
+        for document in documents:
+            if not document.words:
+                skipped += 1
+                continue
+            corpus.write(' '.join(document.words) + '\n')
+            tags.append(document.tags[0])
+            word_counts.append(len(document.words))
+    if skipped:
+        logging.warning(f'{skipped} documents without tokens were not written in the corpus file and get no DocVec.')
+    return tags, word_counts
+
+# In corpus_file-mode the docvecs are tagged with the line number, replace them with the unique_ids (string tags)
+def __retag_docvecs(model, tags, word_counts):
+    model.docvecs.offset2doctag = list(tags)
+    model.docvecs.doctags = {tag: Doctag(offset, word_count, 1) for offset, (tag, word_count) in enumerate(zip(tags, word_counts))}
+    model.docvecs.max_rawint = -1
+    model.docvecs.count = len(tags)
+
+# Training information for the registry
+def __metadata(model, mode):
+    return {'mode': mode, 'vector_size': model.vector_size, 'min_count': params['min_count'], 'epochs': model.epochs, 'alpha': params['alpha'],
+            'documents': len(model.docvecs), 'vocab_size': len(model.wv.vocab)}
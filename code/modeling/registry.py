@@ -0,0 +1,148 @@
+# *** Model Registry ***
+""" Script manages all models of the program (Doc2Vec: d2v_model, d2v_remodel, d2v_compact and TF-IDF: tfidf_model) in one place:
+    * get: loads a model once per process and returns the same object to every consumer (analysis inside/outside, sanity_checks, infer workers)
+    * save: saves a model (doc2vec.save_model, tfidf.save_model) with a metadata-file next to it (<model_path>.meta.json)
+    * fingerprint: content hash of the saved model (stored in the metadata-file), e.g. used as key in the vector_store
+    Doc2Vec models are loaded memory-mapped (mmap='r'), so processes share the vectors. Models which are changed (retraining) are loaded with doc2vec.load_model. """
+
+# ## Imports
+from modeling import doc2vec
+from modeling import tfidf
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import logging
+
+# ## Set Variables
+loaded_models = dict()
+
+# Bytes read at once to hash the model-files
+READ_SIZE = 1 << 24
+
+# ## Functions
+def get(name: str):
+    """ Returns the model, it is loaded only once per process.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model: d2v_model, d2v_remodel, d2v_compact or tfidf_model
+
+    Returns
+    -------
+    model: doc2vec.Doc2Vec or sklearn.feature_extraction.text.TfidfVectorizer
+        The saved model """
+
+    if name not in loaded_models:
+        if name == 'tfidf_model':
+            loaded_models[name] = tfidf.load_model(name)
+        else:
+            loaded_models[name] = doc2vec.load_model(name, mmap='r')
+    return loaded_models[name]
+
+def save(model, name: str, metadata: dict, versioned: bool = False) -> str:
+    """ Saves the model, writes its metadata-file and replaces the loaded model of this process.
+
+    Parameters
+    ----------
+    model: doc2vec.Doc2Vec or sklearn.feature_extraction.text.TfidfVectorizer
+        The model to be saved
+    name : str
+        Name of the model: d2v_model, d2v_remodel, d2v_compact or tfidf_model
+    metadata: dict
+        Information about the training (e.g. parameters, number of documents), stored in the metadata-file
+    versioned: bool
+        Only Doc2Vec: If True, an additional copy with a timestamp is saved (see doc2vec.save_model)
+
+    Returns
+    -------
+    fingerprint: str
+        Content hash of the saved model """
+
+    if name == 'tfidf_model':
+        tfidf.save_model(model)
+    else:
+        doc2vec.save_model(model, name, versioned=versioned)
+    loaded_models[name] = model
+    meta = __write_meta(name, metadata)
+    logging.info(f'Model {name} is registered with fingerprint {meta["fingerprint"]}.')
+    return meta['fingerprint']
+
+def fingerprint(name: str) -> str:
+    """ Content hash of the saved model. Changes whenever the model is saved again with other content.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model: d2v_model, d2v_remodel, d2v_compact or tfidf_model
+
+    Returns
+    -------
+    fingerprint: str
+        Content hash of the model-files """
+
+    return __read_meta(name)['fingerprint']
+
+def metadata(name: str) -> dict:
+    """ Metadata of the saved model (training information, fingerprint, time of saving).
+
+    Parameters
+    ----------
+    name : str
+        Name of the model: d2v_model, d2v_remodel, d2v_compact or tfidf_model
+
+    Returns
+    -------
+    meta: dict
+        Content of the metadata-file """
+
+    return __read_meta(name)
+
+def model_path(name: str) -> Path:
+    """ Path of the model (set in config.yaml: model_paths). """
+    if name == 'tfidf_model':
+        return Path(tfidf.model_path)
+    if name == 'd2v_remodel':
+        return Path(doc2vec.retrained_model_path)
+    if name == 'd2v_compact':
+        return Path(doc2vec.compact_model_path)
+    return Path(doc2vec.model_path)
+
+# ## Private Functions
+
+def __meta_path(name):
+    path = model_path(name)
+    return path.with_name(path.name + '.meta.json')
+
+# Read the metadata-file; if it is missing or the model was changed without the registry, the fingerprint is computed again
+def __read_meta(name):
+    meta_path = __meta_path(name)
+    if meta_path.exists():
+        with open(meta_path, 'r') as fr:
+            meta = json.load(fr)
+        stat = model_path(name).stat()
+        if meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns:
+            return meta
+        logging.warning(f'Model {name} was changed since its metadata was written. The fingerprint is computed again.')
+        return __write_meta(name, meta['metadata'])
+    return __write_meta(name, dict())
+
+def __write_meta(name, metadata):
+    path = model_path(name)
+    stat = path.stat()
+    meta = {'name': name, 'path': str(path), 'fingerprint': __content_hash(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'saved_at': datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds'), 'metadata': metadata}
+    with open(__meta_path(name), 'w') as fw:
+        json.dump(meta, fw, indent=4)
+    return meta
+
+# Hash of the model-file and the arrays gensim saves next to it (<model_path>.*.npy)
+def __content_hash(path):
+    content_hash = hashlib.blake2b(digest_size=16)
+    for file_path in [path] + sorted(path.parent.glob(path.name + '.*.npy')):
+        content_hash.update(file_path.name[len(path.name):].encode('utf-8'))
+        with open(file_path, 'rb') as fr:
+            for block in iter(lambda: fr.read(READ_SIZE), b''):
+                content_hash.update(block)
+    return content_hash.hexdigest()
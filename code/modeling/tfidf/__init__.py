@@ -10,7 +10,14 @@
 # ## Imports
 from . import training
 from . import sanity
+from . import hashing
 import sklearn
+from sklearn.preprocessing import normalize
+import numpy as np
+import scipy.sparse as sp
+from preprocessing import encoding
+from services import vector_store
+from modeling import registry
 from pathlib import Path
 import yaml
 import pickle
@@ -61,6 +68,9 @@ def training_module(args: dict, dict_testdata: dict, dict_traindata: dict, step_
         logging.info('Sanity_Check of TF-IDF model started.')
         sanity.step_sanity_check(dict_testdata, dict_traindata, dict_traindata_prepro, step_key)
         logging.info('Sanity_Check of TF-IDF model finished.')
+    # Compaction
+    if method_args['compact'] == True:
+        logging.warning('Compaction is only available for Doc2Vec models, TF-IDF model is not compacted.')
     # Training, Sanity_Check
     if method_args['training'] == False and method_args['sanity_check'] == False:
         logging.info('Training of the model for TF-IDF started.')
@@ -132,4 +142,70 @@ def load_model(name: str) -> sklearn.feature_extraction.text.TfidfVectorizer:
             print(f'Model {name} failed to be loaded. Check Settings in config.yaml and paths {model_path}.')
             sys.exit(1)
     tfidf_model = __check_model(tfidf_model)
-    return tfidf_model
\ No newline at end of file
+    return tfidf_model
+
+# Transform texts with the tfidf-model (with vector_store)
+def transform(tfidf_model: sklearn.feature_extraction.text.TfidfVectorizer, texts: list) -> sp.csr_matrix:
+    """ Transforms texts in TF-IDF vectors. Texts already transformed with the same model are taken from the vector_store (config.yaml).
+
+    Parameters
+    ----------
+    tfidf_model: sklearn.feature_extraction.text.TfidfVectorizer
+        The loaded model. Type: TfidfVectorizer
+    texts: list
+        List with the preprocessed texts (OneStrings)
+
+    Returns
+    -------
+    vectors: sp.csr_matrix
+        Sparse matrix with one TF-IDF vector per text, same order as texts """
+
+    texts = list(texts)
+    if vector_store.active != True:
+        return sp.csr_matrix(tfidf_model.transform(texts))
+    return vector_store.cached_sparse(registry.fingerprint('tfidf_model'), texts, 
+                lambda positions: tfidf_model.transform([texts[position] for position in positions]), len(tfidf_model.idf_))
+
+
+# Transform encoded texts with the tfidf-model (with vector_store)
+def transform_encoded(tfidf_model: sklearn.feature_extraction.text.TfidfVectorizer, texts: list, encoded: encoding.EncodedDocs) -> sp.csr_matrix:
+    """ Transforms encoded texts (token ids, see preprocessing.encoding) in TF-IDF vectors, the texts are not tokenized again.
+    The vectors are the same as with transform(): counts per model column, sublinear_tf, idf and l2-normalization like the TfidfTransformer.
+    Texts already transformed with the same model are taken from the vector_store (config.yaml).
+
+    Parameters
+    ----------
+    tfidf_model: sklearn.feature_extraction.text.TfidfVectorizer
+        The loaded model. Type: TfidfVectorizer or HashedTfidfVectorizer
+    texts: list
+        List with the preprocessed texts (OneStrings), used as key in the vector_store
+    encoded: encoding.EncodedDocs
+        Token ids of the texts, same order as texts
+
+    Returns
+    -------
+    vectors: sp.csr_matrix
+        Sparse matrix with one TF-IDF vector per text, same order as texts """
+
+    texts = list(texts)
+    def __compute(positions):
+        counts = encoded.counts(__model_columns(tfidf_model, encoded.tokens), len(tfidf_model.idf_))[positions]
+        vectors = counts.astype(np.float64)
+        if tfidf_model.sublinear_tf:
+            vectors.data = np.log(vectors.data) + 1
+        vectors = vectors @ sp.diags(tfidf_model.idf_)
+        return normalize(vectors, norm='l2', copy=False).tocsr()
+    if vector_store.active != True:
+        return __compute(list(range(len(texts))))
+    return vector_store.cached_sparse(registry.fingerprint('tfidf_model'), texts, __compute, len(tfidf_model.idf_))
+
+# Column of each token of the encoded texts in the model (-1: token is not in the model), only the distinct tokens of the texts are looked up
+def __model_columns(tfidf_model, tokens):
+    if isinstance(tfidf_model, hashing.HashedTfidfVectorizer):
+        # one row per token, tokens without a feature have an empty row
+        hashed = tfidf_model.hasher.transform(list(tokens))
+        has_feature = np.diff(hashed.indptr) > 0
+        columns = np.full(len(tokens), -1, dtype=np.int64)
+        columns[has_feature] = hashed.indices[hashed.indptr[:-1][has_feature]]
+        return columns
+    return np.fromiter((tfidf_model.vocabulary_.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens))
@@ -0,0 +1,58 @@
+# *** TF-IDF - Hashed features ***
+""" Script contains the TF-IDF model with hashed features (hashed: true in config.yaml).
+    The words are not stored in a vocabulary, they are mapped to n_features columns by a hash function (HashingVectorizer).
+    So the memory of the model is fixed, independent of the number of distinct words (words with the same hash share one column).
+    The model has transform and idf_ like the TfidfVectorizer, so it is saved, loaded and used the same way (tfidf.load_model, tfidf.transform). """
+
+# ## Imports
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+import numpy as np
+import scipy.sparse as sp
+
+# ## Class HashedTfidfVectorizer
+class HashedTfidfVectorizer:
+    """ Class to manage the TF-IDF model with hashed features: counts the document frequencies chunkwise and transforms texts."""
+    # init method
+    def __init__(self, n_features, sublinear_tf):
+        self.n_features = n_features
+        self.sublinear_tf = sublinear_tf
+        self.hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+        self.transformer = TfidfTransformer(sublinear_tf=sublinear_tf)
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+
+    # count the document frequencies of one chunk of texts
+    def partial_fit(self, texts):
+        counts = self.hasher.transform(texts)
+        self.doc_freq += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs += counts.shape[0]
+        return self
+
+    # set the idf (same formula as TfidfVectorizer: smooth_idf) after all chunks were counted
+    def finish(self):
+        self.transformer.idf_ = np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1
+        self.doc_freq = None
+        return self
+
+    # getter method for the idf
+    @property
+    def idf_(self):
+        return self.transformer.idf_
+
+    # transform texts in TF-IDF vectors (l2-normalized, like TfidfVectorizer)
+    def transform(self, raw_documents) -> sp.csr_matrix:
+        return self.transformer.transform(self.hasher.transform(raw_documents))
+
+    # column of a word (hash), KeyError if the word has no token (like vocabulary_[word])
+    def feature_index(self, word):
+        indices = self.hasher.transform([word]).indices
+        if len(indices) == 0:
+            raise KeyError(word)
+        return indices[0]
+
+    # number of columns which contain at least one word of the traindata
+    def used_features(self):
+        return int(np.count_nonzero(self.idf_ < np.log(1 + self.n_docs) + 1))
+
+    def __repr__(self):
+        return f'HashedTfidfVectorizer(n_features={self.n_features}, sublinear_tf={self.sublinear_tf})'
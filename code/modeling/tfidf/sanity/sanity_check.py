@@ -6,7 +6,8 @@
     ! Important ! Check Settings in config.yaml. Which model do you want to evaluate? Check tfidf_model path."""
 
 # ## Imports
-from modeling import tfidf
+from modeling import registry
+from modeling.tfidf import hashing
 import random
 import logging
 
@@ -29,11 +30,16 @@ def evaluate_sample(dict_testdata_prepro: dict, dict_traindata_prepro: dict) ->
     KeyError
         Raises Exception if a word is not part of the vocab. """
 
-    tfidf_model = tfidf.load_model('tfidf_model')
+    tfidf_model = registry.get('tfidf_model')
+    hashed = isinstance(tfidf_model, hashing.HashedTfidfVectorizer)
 
     # IN GENERAL
-    logging.info(f'\n\nSanity_check shows: vocabsize of the trained model {tfidf_model} is: {len(tfidf_model.get_feature_names())}')
-    logging.info(f'10 random sample words from vocab: {random.sample(tfidf_model.get_feature_names(), 10)}')
+    if hashed:
+        # hashed features have no vocabulary
+        logging.info(f'\n\nSanity_check shows: {tfidf_model.used_features()} of {tfidf_model.n_features} columns of the trained model {tfidf_model} are used.')
+    else:
+        logging.info(f'\n\nSanity_check shows: vocabsize of the trained model {tfidf_model} is: {len(tfidf_model.get_feature_names())}')
+        logging.info(f'10 random sample words from vocab: {random.sample(tfidf_model.get_feature_names(), 10)}')
 
     # Zip test- and traindata in a dict for looping purposes
     data_dict = {'test_data': dict_testdata_prepro, 'train_data': dict_traindata_prepro}
@@ -52,7 +58,8 @@ def evaluate_sample(dict_testdata_prepro: dict, dict_traindata_prepro: dict) ->
         logging.info(f'\n\nRandom sample evaluation for {name} with {tfidf_model}: \n Document with unique_id {key} was chosen.')
         for word in random_words:
             try: 
-                logging.info(f'The word: \"{word}\" has the tfidf-score:   {X[0, tfidf_model.vocabulary_[word]]}')
+                column = tfidf_model.feature_index(word) if hashed else tfidf_model.vocabulary_[word]
+                logging.info(f'The word: \"{word}\" has the tfidf-score:   {X[0, column]}')
             except KeyError:
                 logging.info(f'The word: \"{word}\" is not part of the vocabulary.')
                 continue
\ No newline at end of file
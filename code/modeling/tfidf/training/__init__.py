@@ -5,17 +5,26 @@
     2. Preprocess Data
         * Pass data to Preprocessing and get a Dictionary with OneStrings in return.
     3. Pass preprocessed Data to Training
-        * Pass preprocessed data to Training."""
+        * Pass preprocessed data to Training.
+    With streaming: true (config.yaml) the preprocessed data is passed chunkwise to the Training, only the document frequencies are kept."""
 
 # ## Imports
 from . import tfidf_training
-import modeling
+from services import connection_preparation
 from typing import Union
+from pathlib import Path
+import yaml
+import modeling
 
 # ## Define and Set Variables
 dict_traindata = dict()
 dict_traindata_prepro = dict()
 
+# ## Open Configuration-file and set training mode
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    streaming = cfg['tfidf_model']['streaming']
+
 # ## Functions
 def step_train_tfidf(dict_traindata: dict, step_key: str) -> Union[dict, dict]:
     """ Manages Loading and Preprocessing of data. Passes preprocessed data to Training.
@@ -34,10 +43,18 @@ def step_train_tfidf(dict_traindata: dict, step_key: str) -> Union[dict, dict]:
     dict_traindata_prepro: dict
         Dictionary with trainingdata -> keys: table_names, values: Dict(keys: uid, values: preprocessed OneStrings) """
     
-    # Load Traindata (if not already loaded)
-    dict_traindata = modeling.load_traindata(dict_traindata)
-    # Preprocess Traindata (return TaggedDocument object saved in dict)
-    dict_traindata_prepro = modeling.preprocess_data(dict_traindata, step_key)
+    # Streaming-mode: fit the model chunkwise (preprocessed data is not kept, later steps reload it)
+    if streaming == True:
+        if not dict_traindata:
+            chunks = modeling.iter_prepro_chunks(connection_preparation.conn_training(), step_key)
+            tfidf_training.train_stream(chunk_prepro for name, chunk_prepro in chunks)
+            return dict_traindata, dict()
+        dict_traindata, dict_traindata_prepro = modeling.prepro_traindata(dict_traindata, step_key)
+        tfidf_training.train_stream(dict_traindata_prepro.values())
+        return dict_traindata, dict_traindata_prepro
+
+    # Load Traindata (if not already loaded) and preprocess it (return TaggedDocument object saved in dict)
+    dict_traindata, dict_traindata_prepro = modeling.prepro_traindata(dict_traindata, step_key)
     # Train the data
     tfidf_training.train_data(dict_traindata_prepro)
 
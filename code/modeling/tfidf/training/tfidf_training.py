@@ -1,11 +1,18 @@
 # *** TF-IDF Training***
-""" Script trains a TF-IDF model."""
+""" Script trains a TF-IDF model.
+    * train_data: fits the TfidfVectorizer with all traindata at once (in memory)
+    * train_stream: counts the document frequencies chunk by chunk (streaming: true in config.yaml), only the counts are kept in memory.
+      With hashed: true the words are hashed in n_features columns (fixed memory, no vocabulary). """
 
 # ## Imports
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+from collections import Counter
+from typing import Iterable
+import numpy as np
 import yaml
 from pathlib import Path
-from modeling import tfidf
+from modeling import registry
+from modeling.tfidf import hashing
 import logging
 import itertools
 
@@ -32,10 +39,63 @@ def train_data(dict_traindata_prepro: dict):
     logging.info(f'Model Settings: {tfidftransformer}')
 
     # MANAGE DATA AND FIT THE VOCAB
-    train_data = list(itertools.chain(*[sum([list(v.values())], []) for v in dict_traindata_prepro.values()]))
+    train_data = list(itertools.chain.from_iterable(v.values() for v in dict_traindata_prepro.values()))
     tfidf_model = tfidftransformer.fit(train_data)
     logging.info('Vocab was fitted.')
     logging.info(f'For the model {tfidf_model} the vocab size is: {len(tfidf_model.get_feature_names())}.')
  
     # SAVE MODEL
-    tfidf.save_model(tfidf_model)
\ No newline at end of file
+    registry.save(tfidf_model, 'tfidf_model', {'mode': 'fit', 'sublinear_tf': params['sublinear_tf'], 'documents': len(train_data), 'vocab_size': len(tfidf_model.vocabulary_)})
+
+def train_stream(chunks: Iterable[dict]):
+    """ Method trains a TF-IDF model chunk by chunk with following steps:
+        - Count the document frequencies of each chunk (preprocessed) and add them up
+        - Compute the idf (same formula as TfidfVectorizer.fit, so the model is the same as with train_data)
+        - Save the model (TfidfVectorizer or HashedTfidfVectorizer with hashed: true)
+
+    Parameters
+    ----------
+    chunks: Iterable[dict]
+        Iterable with the preprocessed chunks -> Dict(keys: uid, values: preprocessed OneStrings) """
+
+    # HASHED FEATURES: fixed number of columns, no vocabulary
+    if params['hashed'] == True:
+        tfidf_model = hashing.HashedTfidfVectorizer(params['n_features'], params['sublinear_tf'])
+        logging.info(f'Model Settings: {tfidf_model}')
+        for chunk in chunks:
+            tfidf_model.partial_fit(list(chunk.values()))
+        tfidf_model.finish()
+        logging.info(f'For the model {tfidf_model} {tfidf_model.used_features()} of {tfidf_model.n_features} columns are used by {tfidf_model.n_docs} documents.')
+        registry.save(tfidf_model, 'tfidf_model', {'mode': 'hashed', 'sublinear_tf': params['sublinear_tf'], 'documents': tfidf_model.n_docs, 'n_features': tfidf_model.n_features})
+        return
+
+    # VOCABULARY: document frequency per word
+    doc_freq = Counter()
+    n_docs = 0
+    for chunk in chunks:
+        texts = list(chunk.values())
+        n_docs += len(texts)
+        counter = CountVectorizer(binary=True)
+        try:
+            counts = counter.fit_transform(texts)
+        except ValueError:
+            # chunk without any words
+            continue
+        chunk_freq = np.asarray(counts.sum(axis=0)).ravel()
+        doc_freq.update({word: int(chunk_freq[column]) for word, column in counter.vocabulary_.items()})
+    tfidf_model = __vectorizer_from_counts(doc_freq, n_docs)
+    logging.info('Vocab was fitted chunkwise.')
+    logging.info(f'For the model {tfidf_model} the vocab size is: {len(tfidf_model.vocabulary_)}.')
+    registry.save(tfidf_model, 'tfidf_model', {'mode': 'streaming', 'sublinear_tf': params['sublinear_tf'], 'documents': n_docs, 'vocab_size': len(tfidf_model.vocabulary_)})
+
+# Set vocabulary and idf of a TfidfVectorizer from the document frequencies (vocabulary sorted like in fit)
+def __vectorizer_from_counts(doc_freq, n_docs):
+    if not doc_freq:
+        raise ValueError('empty vocabulary; perhaps the documents only contain stop words')
+    words = sorted(doc_freq)
+    tfidf_model = TfidfVectorizer(sublinear_tf = params['sublinear_tf'])
+    tfidf_model.vocabulary_ = {word: column for column, word in enumerate(words)}
+    tfidf_model.stop_words_ = set()
+    frequencies = np.array([doc_freq[word] for word in words], dtype=np.float64)
+    tfidf_model.idf_ = np.log((1 + n_docs) / (1 + frequencies)) + 1
+    return tfidf_model
@@ -2,12 +2,36 @@
 
 # ## Imports
 from . import preprocessing_data
+from . import encoding
 import pandas as pd
+from typing import Iterator, Tuple
+import logging
 
-def preprocess_data(df: pd.DataFrame, key: str) -> list or dict:
+def preprocess_data(df: pd.DataFrame, key: str, table: preprocessing_data.PreprocessedTable = None) -> list or dict or preprocessing_data.PreprocessedTable:
+    # A table from preprocess_combined (same data as df) is used instead of tokenizing df again
+    if table is not None and key in ('doc2vec', 'tfidf', 'preprocessing'):
+        if table.matches(df):
+            logging.info('Tokens of the combined preprocessing are used, the table is not tokenized again.')
+            return list(table.tagged()) if key == 'doc2vec' else dict(table.onestrings())
+        logging.warning('The combined preprocessing was built from other data than the passed table, the table is tokenized again.')
     if key == "doc2vec":
         data = preprocessing_data.preprocess_labeled(df)
         return data
     elif key == "tfidf" or key == 'preprocessing':
         data = preprocessing_data.preprocess_strings(df)
-        return data
\ No newline at end of file
+        return data
+    elif key == 'combined':
+        data = preprocessing_data.preprocess_combined(df)
+        return data
+
+def preprocess_combined_tables(dict_data: dict) -> dict:
+    """ Tokenizes each table once for steps which need both outputs (TaggedDocuments and OneStrings) of the same data.
+    The caller keeps the returned dict and passes the tables to preprocess_data. Empty if combined: false (config.yaml: preprocessing). """
+    if preprocessing_data.combined != True:
+        return dict()
+    return {name: preprocess_data(df, 'combined') for name, df in dict_data.items()}
+
+def preprocess_chunks(chunks: Iterator[Tuple[str, pd.DataFrame]], key: str) -> Iterator[Tuple[str, pd.DataFrame, list or dict]]:
+    """ Preprocesses the chunks from manage_dfs.iter_chunks() one after another. Yields the table_name, the chunk and the preprocessed chunk. """
+    for name, chunk in chunks:
+        yield name, chunk, preprocess_data(chunk, key)
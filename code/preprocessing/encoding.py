@@ -0,0 +1,82 @@
+# ## Encoding
+""" Script encodes preprocessed texts as token ids. The documents of a table are stored in one EncodedDocs-object:
+    all token ids in one uint32 array, the offsets mark the documents, the tokens of the ids are the vocabulary of this object only
+    (no global vocabulary, it is freed with the table and can be passed to worker processes as it is).
+    Scope: the token ids are used by the calculations that count tokens (analysis inside: countvec, tfidf, shingling; tfidf_finder)
+    and by the combined preprocessing (one compact buffer per table). The preprocessing still returns OneStrings and TaggedDocuments,
+    because levenshtein compares strings and gensim (training, infer_vector) needs the words. """
+
+# ## Imports
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import itertools
+
+# ## Class EncodedDocs
+class EncodedDocs:
+    """ Class to manage the token ids of several documents (one uint32 array per document, stored in one array) and their vocabulary."""
+    # init method
+    def __init__(self, ids, offsets, tokens):
+        self.ids = ids
+        self.offsets = offsets
+        self.tokens = tokens
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # token ids of one document
+    def __getitem__(self, position):
+        return self.ids[self.offsets[position]:self.offsets[position + 1]]
+
+    # number of tokens per document
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    # tokens (strings) of one document
+    def words(self, position):
+        return self.tokens[self[position]].tolist()
+
+    # count matrix (one row per document); columns maps each token id to a column (-1: token is not counted)
+    def counts(self, columns: np.ndarray = None, n_columns: int = None) -> sp.csr_matrix:
+        rows = np.repeat(np.arange(len(self)), self.lengths())
+        cols = self.ids.astype(np.int64)
+        if columns is not None:
+            cols = columns[cols]
+            rows, cols = rows[cols >= 0], cols[cols >= 0]
+        n_columns = len(self.tokens) if n_columns is None else n_columns
+        # duplicate entries (same token in one document) are summed up
+        return sp.csr_matrix((np.ones(len(cols), dtype=np.int64), (rows, cols)), shape=(len(self), n_columns))
+
+# ## Functions
+def encode_texts(texts: list) -> EncodedDocs:
+    """ Encodes preprocessed texts (OneStrings, tokens separated by spaces).
+
+    Parameters
+    ----------
+    texts: list
+        List with the preprocessed texts (OneStrings)
+
+    Returns
+    -------
+    encoded: EncodedDocs
+        Token ids of all texts, same order as texts """
+
+    return encode_tokens([text.split() for text in texts])
+
+def encode_tokens(tokens_lists: list) -> EncodedDocs:
+    """ Encodes tokenized texts, the ids are the positions of the tokens in the vocabulary of the returned object (order of first occurrence).
+
+    Parameters
+    ----------
+    tokens_lists: list
+        List with one list of tokens per text
+
+    Returns
+    -------
+    encoded: EncodedDocs
+        Token ids of all texts, same order as tokens_lists """
+
+    lengths = np.fromiter((len(tokens_list) for tokens_list in tokens_lists), dtype=np.int64, count=len(tokens_lists))
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    codes, uniques = pd.factorize(pd.Series(list(itertools.chain.from_iterable(tokens_lists)), dtype=object))
+    return EncodedDocs(codes.astype(np.uint32), offsets, np.asarray(uniques, dtype=object))
@@ -3,15 +3,68 @@
     1. to preprocess the data (stopwords, tokenization whitespace, lowercase)
         Returns: List with TaggedDocument objects (tokens_list, unique_id)
     2. to preprocess the data (stopwords, tokenization, lowercase, punctuation removal)
-        Returns: Dictionary with keys = unique_ids and values = OneStrings """
+        Returns: Dictionary with keys = unique_ids and values = OneStrings 
+    Both use the same tokenization: the table is split in chunks (chunk_size) which are tokenized by several worker processes (workers, config.yaml: preprocessing).
+    The stopwords are loaded once per process, the results keep the order of the table.
+    Tokens of full_texts which were already preprocessed are taken from the token_cache (config.yaml) and not tokenized again.
+    3. preprocess_combined: tokenizes a table once and keeps the tokens in one token buffer (PreprocessedTable, token ids see encoding).
+        Both outputs (1. and 2.) are built from the buffer when they are needed. The caller holds the table and passes it to the steps
+        which need the outputs (preprocessing.preprocess_data), so a run with doc2vec and preprocessing tokenizes each table only once. """
         
 # ## Imports
 from nltk.corpus import stopwords 
 from gensim.models.doc2vec import TaggedDocument
 from gensim.utils import simple_preprocess
+from services import token_cache
+from . import encoding
+from multiprocessing import Pool
+from typing import Iterator, Tuple
 import pandas as pd
+import hashlib
+import yaml
+from pathlib import Path
 import logging
 
+# ## Set Variables
+stop_words = None
+# Version of the preprocessing (key in the token_cache), increase it if the tokenization is changed
+PREPRO_VERSION = 'simple_preprocess-stopwords_german-1'
+
+# ## Open Configuration-file and set number of worker processes and chunk size
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    prepro_params = cfg['preprocessing']
+    workers = prepro_params['workers']
+    chunk_size = prepro_params['chunk_size']
+    combined = prepro_params['combined']
+
+# ## Class PreprocessedTable
+class PreprocessedTable:
+    """ Class to manage the tokens of one table: tokenized once, stored as token ids in one buffer (encoding.EncodedDocs).
+    The TaggedDocuments and OneStrings are built from the buffer when they are needed. """
+    # init method
+    def __init__(self, unique_ids, tokens_lists, source_key):
+        self.unique_ids = list(unique_ids)
+        self.encoded = encoding.encode_tokens(tokens_lists)
+        self.source_key = source_key
+
+    def __len__(self):
+        return len(self.unique_ids)
+
+    # True if the table was preprocessed from the same unique_ids and full_texts as df
+    def matches(self, df: pd.DataFrame) -> bool:
+        return self.source_key == source_key(df)
+
+    # TaggedDocuments(tokens_list, [unique_id]) for doc2vec
+    def tagged(self) -> Iterator[TaggedDocument]:
+        for position, unique_id in enumerate(self.unique_ids):
+            yield TaggedDocument(self.encoded.words(position), [unique_id])
+
+    # (unique_id, OneString) for tfidf and preprocessing
+    def onestrings(self) -> Iterator[Tuple[str, str]]:
+        for position, unique_id in enumerate(self.unique_ids):
+            yield unique_id, ' '.join(self.encoded.words(position))
+
 # ## Functions
 def preprocess_labeled(df: pd.DataFrame) -> list:
     """ Function manages the preprocessing for doc2vec related actions. 
@@ -38,17 +91,9 @@ def preprocess_labeled(df: pd.DataFrame) -> list:
         Data contains of TaggedDocument-objects(tokens_list, unique_id) """
         
     data = list()
-    # Iterate over each datarow in DataFrame
-    for row in df.itertuples(): 
-        # set lists for tokenization and stopwords removal
-        tokens_list = list()
-        stop_words = set(stopwords.words('german'))  
-        try:
-            tokens_list = __exe_prepro(tokens_list, stop_words, row)
-            data.append(TaggedDocument(tokens_list,[row.unique_id]))
-        except MemoryError:
-            logging.warning(f'Token from datarow {row.unique_id} is too long. Program continues with next datarow.')
-            continue
+    # Tokenize all datarows (in parallel, same order as df)
+    for unique_id, tokens_list in __tokenize(df):
+        data.append(TaggedDocument(tokens_list,[unique_id]))
     return data
 
 def preprocess_strings(df: pd.DataFrame) -> dict:
@@ -75,25 +120,80 @@ def preprocess_strings(df: pd.DataFrame) -> dict:
     """
     preprocessed_onestrings = list()
     unqiue_id_list = list()
-    # Iterate over each datarow in DataFrame
-    for row in df.itertuples(): 
-        # set lists for tokenization and stopwords removal
-        tokens_list = list()
+    # Tokenize all datarows (in parallel, same order as df)
+    for unique_id, tokens_list in __tokenize(df):
+        # make onestring and no list
+        preprocessed_onestrings.append(' '.join(tokens_list))
+        unqiue_id_list.append(unique_id)
+    data = dict(zip(unqiue_id_list, preprocessed_onestrings))
+    return data
+
+def preprocess_combined(df: pd.DataFrame) -> PreprocessedTable:
+    """ Function tokenizes a table once for doc2vec and tfidf/preprocessing (same preprocessing-steps as preprocess_labeled and preprocess_strings).
+    The returned table builds both outputs from one token buffer: tagged() yields TaggedDocuments, onestrings() yields unique_ids and OneStrings.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        One table from dictionary with the whole dataset. Contains unique_ids and full_texts.
+
+    Returns
+    -------
+    table: PreprocessedTable
+        Tokens of all datarows which could be tokenized (same order as df) """
+
+    unique_ids = list()
+    tokens_lists = list()
+    for unique_id, tokens_list in __tokenize(df):
+        unique_ids.append(unique_id)
+        tokens_lists.append(tokens_list)
+    return PreprocessedTable(unique_ids, tokens_lists, source_key(df))
+
+def source_key(df: pd.DataFrame) -> str:
+    """ Hash of the unique_ids and full_texts of a table, identifies the data a PreprocessedTable was built from. """
+    return hashlib.blake2b(pd.util.hash_pandas_object(df[['unique_id', 'full_text']], index=False).to_numpy().tobytes(), digest_size=16).hexdigest()
+
+# Tokenize the full_texts of all datarows, only the texts which are not in the token_cache
+def __tokenize(df):
+    full_texts = list(df['full_text'])
+    tokens_lists = token_cache.cached_tokens(PREPRO_VERSION, full_texts, lambda positions: __tokenize_parallel([full_texts[position] for position in positions]))
+    for unique_id, tokens_list in zip(df['unique_id'], tokens_lists):
+        if tokens_list is None:
+            logging.warning(f'Token from datarow {unique_id} is too long. Program continues with next datarow.')
+            continue
+        yield unique_id, tokens_list
+
+# Tokenize the full_texts in chunks, by several worker processes if there is more than one chunk
+def __tokenize_parallel(full_texts):
+    chunks = [full_texts[start:start + chunk_size] for start in range(0, len(full_texts), chunk_size)]
+    if workers <= 1 or len(chunks) <= 1:
+        __init_worker()
+        results = [__tokenize_chunk(chunk) for chunk in chunks]
+    else:
+        with Pool(processes=min(workers, len(chunks)), initializer=__init_worker) as pool:
+            # map keeps the order of the chunks
+            results = pool.map(__tokenize_chunk, chunks)
+    return [tokens_list for tokens_lists in results for tokens_list in tokens_lists]
+
+# Load the stopwords once per process
+def __init_worker():
+    global stop_words
+    if stop_words is None:
         stop_words = set(stopwords.words('german'))
+
+# Tokenize one chunk, None for datarows with too long tokens
+def __tokenize_chunk(chunk):
+    tokens_lists = list()
+    for full_text in chunk:
         try:
-            tokens_list = __exe_prepro(tokens_list, stop_words, row)
-            # make onestring and no list
-            preprocessed_onestrings.append(' '.join(tokens_list))
-            unqiue_id_list.append(row.unique_id)
+            tokens_lists.append(__exe_prepro(list(), stop_words, full_text))
         except MemoryError:
-            logging.warning(f'Token from datarow {row.unique_id} is too long. Program continues with next datarow.')
-            continue
-    data = dict(zip(unqiue_id_list, preprocessed_onestrings))
-    return data
+            tokens_lists.append(None)
+    return tokens_lists
 
-def __exe_prepro(tokens_list, stop_words, row):
+def __exe_prepro(tokens_list, stop_words, full_text):
     # start simple_preprocess from genism for texts
-    tokens = simple_preprocess(row.full_text)
+    tokens = simple_preprocess(full_text)
     # remove stopwords
     for token in tokens:
         if token not in stop_words:
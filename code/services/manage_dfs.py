@@ -6,22 +6,26 @@
             chunksize: needs to be adjusted manually in config
             countermax_per_table: needs to be adjusted manually in config
             filter_tablename: needs to be adjusted manually in config or commented out
+            stream_chunks: if true, the steps consume the chunks from iter_chunks() directly and the tables are not held in memory completely
     * Furthermore the results from analysis can be mapped with the data from the Datadict_data to store the results. 
     * Output-Datadict_data are written in new created or old SQL-Databases via conncetion-objects """
 
 # ## Imports
 import pandas as pd
+import numpy as np
 import sqlite3
 import logging
 import yaml
 from pathlib import Path
 import sys
+from typing import Iterator, Tuple
 
 # ## Open Configuration-file and set variables
 with open(Path("config.yaml"), "r") as yamlfile:
     cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
     chunk_size = (cfg['chunk_size'])
     countermax_per_table = (str(cfg['countermax_per_table']))
+    stream_chunks = (cfg['stream_chunks'])
     try:
         filter_tablename = (str(cfg['filter_tablename']))
     except KeyError:
@@ -29,6 +33,49 @@ with open(Path("config.yaml"), "r") as yamlfile:
 
 # ## Functions
 
+# Read SQL-Databases chunkwise and yield the chunks table by table
+def iter_chunks(conn: sqlite3.Connection, columns: str = '*') -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Query all rows in the tasks tables and yield them chunkwise (type: DataFrame). At most chunk_size rows are held per chunk,
+    so a table never needs to be loaded completely. The column "index" counts the rows over the whole table (not per chunk).
+
+    Parameters
+    ----------
+    conn: sqlite3.Connection
+        the Connection object
+    columns: str
+        Columns to select from each table (e.g. "unique_id, full_text"). Default: all columns.
+
+    Yields
+    ------
+    name: str
+        Name of the table the chunk belongs to
+    chunk: pd.DataFrame
+        DataFrame with at most chunk_size job-ads
+    """
+    logging.info(f'Connection was delivered and data will be extracted chunkwise.')
+    # Tablenames will be extracted first, so the cursor is not blocked while the chunks are read
+    table_names = [name[0] for name in conn.execute("SELECT name FROM sqlite_master WHERE type='table';")]
+    for name in table_names:
+        if filter_tablename and filter_tablename in name:
+            continue
+        logging.info(f'The table {name} was found and chunksize is set to {chunk_size}.')
+        counter = 0
+        df_store = pd.read_sql(("SELECT {} FROM {}".format(columns, name)), conn, chunksize=chunk_size)
+        for chunk in df_store:
+            # Cut the chunk if the maximum of rows per table is reached
+            if int(countermax_per_table) != 0 and counter + len(chunk) > int(countermax_per_table):
+                chunk = chunk.iloc[:int(countermax_per_table) - counter].copy()
+            chunk.index = pd.RangeIndex(counter, counter + len(chunk))
+            chunk['index'] = chunk.index
+            # An empty table is yielded as one empty chunk (so it stays in the data like before)
+            if len(chunk) > 0 or counter == 0:
+                yield name, chunk
+            counter += len(chunk)
+            if int(countermax_per_table) != 0 and counter >= int(countermax_per_table):
+                break
+        logging.info(f'In table {name}, {counter} datarows were extracted or end of table is reached. Continue with next table.')
+
 # Read SQL-Databases and store the tables in DataFrames
 def get_df(conn: sqlite3.Connection) -> dict:
     """
@@ -44,33 +91,7 @@ def get_df(conn: sqlite3.Connection) -> dict:
     dict_data: dict
         Dictionary with trainingdata -> keys: table_names, values: DataFrames with job-ads
     """
-    ### try dataframe
-    # Tablenames will be extracted
-    logging.info(f'Connection was delivered and data will be extracted.')
-    res = conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    counter = 0
-    dict_data = dict()
-    for name in res:
-        if not(filter_tablename) or filter_tablename not in name[0]:
-            df_temp = pd.DataFrame()
-            logging.info(f'The table {name[0]} was found and chunksize is set to {chunk_size}.')
-            # Select all from data
-            df_store = pd.read_sql(("SELECT * FROM {}".format(name[0])), conn, chunksize=chunk_size)
-            for chunk in df_store: 
-                counter+=chunk_size
-                if (int(countermax_per_table) != 0 and counter == int(countermax_per_table)) or len(chunk) < chunk_size:
-                    df_temp = df_temp.append(chunk)
-                    df_temp = df_temp.reset_index(drop=True)
-                    df_temp['index'] = df_temp.index
-                    dict_data[name[0]] = df_temp
-                    logging.info(f'In table {name[0]}, {counter} datarows were extracted or end of table is reached. Continue with next table.')
-                    counter=0
-                    break
-                else: 
-                    df_temp = df_temp.append(chunk)
-                    pass
-        else: 
-            continue
+    dict_data = __collect_chunks(iter_chunks(conn))
     __check_if_filled(dict_data)
     logging.info('Data is processed and stored in Dictionary and is now returned to next step.')
     return dict_data
@@ -82,9 +103,7 @@ def add_converted_data_to_frame(df: pd.DataFrame, result_dict: dict, step_key: s
     Gets Dataframe with input data and the result_dictionary from analysis_step. Then the results are mapped via label to the data and the edited 
     dataframe is returend. 
 
-    For all steps except preprocessing the pairing_label is used to map, because in the analysis calculation the pairing_dataset is used.
-    Therefore some datarows are duplicated, because they have several potential duplicate-partners.
-    Means, the unique_ids are not unique inside the analysis calculation, but the pairing_labels are.
+    The scores of the analysis calculation are not mapped via label, they are added by position (see add_scores_to_frame).
     
     Parameters
     ----------
@@ -106,20 +125,30 @@ def add_converted_data_to_frame(df: pd.DataFrame, result_dict: dict, step_key: s
     if step_key == 'preprocessing':
         df_edited['OneString']= df_edited['unique_id'].map(result_dict)
 
-    elif step_key == 'levenshtein':
-        df_edited['levenshtein']= df_edited['pairing_label'].map(result_dict)
-       
-    elif step_key == 'countvec':
-        df_edited['countvec']= df_edited['pairing_label'].map(result_dict)
-        
-    elif step_key == 'tfidf':
-        df_edited['tfidf']= df_edited['pairing_label'].map(result_dict)
-        
-    elif step_key == 'doc2vec':
-        df_edited['doc2vec']= df_edited['pairing_label'].map(result_dict)
+    logging.info(f'Result data is done. Dataframe now contains new column with results from step {step_key}')
+    return df_edited
+
+def add_scores_to_frame(df: pd.DataFrame, scores: np.ndarray, step_key: str) -> pd.DataFrame:
+    """ 
+    Gets Dataframe with the pairing_dataset and the scores from the analysis calculation. The scores are added by position, 
+    because in the pairing_dataset some datarows are duplicated (several potential duplicate-partners), so the unique_ids are not unique.
 
-    elif step_key == 'shingling':
-        df_edited['shingling']= df_edited['pairing_label'].map(result_dict)
+    Parameters
+    ----------
+    df: pd.Dataframe
+        the input dataframe based on one table from dict_data
+    scores: np.ndarray
+        Array with one score per row of df (same order), e.g. Cosine-Scores.
+    step_key: str
+        Key to decide which step should be executed, used as name of the new column.
+
+    Returns
+    -------
+    df_edited: pd.DataFrame
+        Dataframe with the edited data. Contains one more column with the scores.
+    """
+    df_edited = df.copy()
+    df_edited[step_key] = scores
     logging.info(f'Result data is done. Dataframe now contains new column with results from step {step_key}')
     return df_edited
 
@@ -152,6 +181,26 @@ def write_df_output(conn: sqlite3.Connection, key: str, df: pd.DataFrame) -> Non
     data.to_sql(key, conn, if_exists = 'replace', chunksize = 1000, index = False)
        
 
+# appends one chunk to the table for output (the first chunk of a table replaces an old table with the same name)
+def write_chunk_output(conn: sqlite3.Connection, key: str, df: pd.DataFrame, first_chunk: bool) -> None:
+    """
+    Uses a chunk of the final data and the given SQL-connection to write it chunkwise in the output-file. 
+    Key is the tablename for the table. The first chunk of a table replaces an existing table, all following chunks are appended.
+
+    Parameters
+    ----------
+    conn: sqlite3.Connection
+        Connection to the output_file.
+    key: str
+        Key to name the output table.
+    df: pd.Dataframe
+        one chunk of the final data to be stored in output file.
+    first_chunk: bool
+        True if the chunk is the first one of the table.
+    """
+    if_exists = 'replace' if first_chunk else 'append'
+    df.to_sql(key, conn, if_exists = if_exists, chunksize = 1000, index = False)
+
 # ONLY used for training (selects only unique_id and full_text to be faster)
 def get_df_train(conn: sqlite3.Connection) -> dict:
     """
@@ -168,36 +217,17 @@ def get_df_train(conn: sqlite3.Connection) -> dict:
     dict_data: dict
         Dictionary with trainingdata -> keys: table_names, values: DataFrames with job-ads (only unique_ids and full_texts)
     """
-    ### try dataframe
-    # Tablenames will be extracted
-    logging.info(f'Connection was delivered and data will be extracted.')
-    res = conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    counter = 0
-    dict_data = dict()
-    for name in res:
-        if not(filter_tablename) or filter_tablename not in name[0]:
-            df_temp = pd.DataFrame()
-            logging.info(f'The table {name[0]} was found and chunksize is set to {chunk_size}.')
-            # Select only unique_id and full_text from data
-            df_store = pd.read_sql(("SELECT unique_id, full_text FROM {}".format(name[0])), conn, chunksize=chunk_size)
-            for chunk in df_store: 
-                counter+=chunk_size
-                if (int(countermax_per_table) != 0 and counter == int(countermax_per_table)) or len(chunk) < chunk_size:
-                    df_temp = df_temp.append(chunk)
-                    df_temp = df_temp.reset_index(drop=True)
-                    df_temp['index'] = df_temp.index
-                    dict_data[name[0]] = df_temp
-                    logging.info(f'In table {name[0]} {counter} datarows were extracted or end of table is reached. Continue with next table.')
-                    counter=0
-                    break
-                else: 
-                    df_temp = df_temp.append(chunk)
-                    pass
-        else:
-            continue
+    dict_data = __collect_chunks(iter_chunks(conn, 'unique_id, full_text'))
     __check_if_filled(dict_data)
     return dict_data
 
+# Concatenate the chunks of each table once (appending chunk by chunk would copy the whole table for each chunk)
+def __collect_chunks(chunks: Iterator[Tuple[str, pd.DataFrame]]) -> dict:
+    dict_chunks = dict()
+    for name, chunk in chunks:
+        dict_chunks.setdefault(name, list()).append(chunk)
+    return {name: pd.concat(list_chunks) for name, list_chunks in dict_chunks.items()}
+
 def __check_if_filled(data):
     if not data or data == '':
         logging.error('Data could not be loaded. Check paths or databases.')
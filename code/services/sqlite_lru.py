@@ -0,0 +1,117 @@
+# ## SQLite-LRU
+""" Script contains the SQLite storage shared by the vector_store and the token_cache:
+Each value is stored with the hash of its text and a namespace (e.g. fingerprint of the model, version of the preprocessing).
+Only the values of missing texts are computed. The store holds max. max_entries values, the values that were not used for the longest time are removed first (LRU).
+The write lock is only held shortly: the lookup is committed before the missing values are computed, they are inserted in a second transaction.
+"""
+
+# ## Imports
+import sqlite3
+import hashlib
+import math
+import time
+from pathlib import Path
+from typing import Callable, Tuple
+import logging
+
+# Number of hashes per SQL-statement (SQLite allows max. 999 variables)
+BATCH_SIZE = 900
+
+# ## Classes
+class LRUStore:
+    """ SQLite file with one table of values (key: hash of the text and namespace), removes the least recently used values.
+
+    Parameters
+    ----------
+    path: Path
+        Path of the SQLite file
+    max_entries: int
+        Max. number of stored values
+    label: str
+        Name of the store in the log messages """
+
+    def __init__(self, path: Path, max_entries: int, label: str):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.label = label
+
+    def cached(self, namespace: str, texts: list, compute: Callable[[list], list], codec: Tuple[Callable, Callable]) -> list:
+        """ Returns one value per text. Values found in the store are reused, only the missing ones are computed and stored.
+
+        Parameters
+        ----------
+        namespace: str
+            Second part of the key (e.g. fingerprint of the model), values of other namespaces are not used
+        texts: list
+            List with the texts (strings; None and NaN are keys of their own), used as key
+        compute: Callable[[list], list]
+            Function that gets a list of positions in texts and returns their values (one per position)
+        codec: Tuple[Callable, Callable]
+            encode (value -> bytes, None if the value is not stored) and decode (bytes -> value)
+
+        Returns
+        -------
+        values: list
+            List with one value per text, same order as texts (equal texts get the same object) """
+
+        encode, decode = codec
+        hashes = [self.__text_hash(text) for text in texts]
+        first_position = dict()
+        for position, text_hash in enumerate(hashes):
+            first_position.setdefault(text_hash, position)
+
+        conn = self.__connect()
+        try:
+            with conn:
+                found = self.__load(conn, namespace, list(first_position), decode)
+            missing = [text_hash for text_hash in first_position if text_hash not in found]
+            computed = dict()
+            if missing:
+                # computed without an open transaction, other processes can use the store meanwhile
+                computed = dict(zip(missing, compute([first_position[text_hash] for text_hash in missing])))
+                now = time.time_ns()
+                blobs = ((text_hash, encode(value)) for text_hash, value in computed.items())
+                with conn:
+                    conn.executemany('INSERT OR REPLACE INTO entries (text_hash, namespace, value, last_access) VALUES (?, ?, ?, ?)',
+                        ((text_hash, namespace, blob, now) for text_hash, blob in blobs if blob is not None))
+                    self.__evict(conn)
+        finally:
+            conn.close()
+        logging.info(f'{self.label}: {len(found)} of {len(first_position)} distinct texts were found, {len(missing)} were computed.')
+        return [found[text_hash] if text_hash in found else computed[text_hash] for text_hash in hashes]
+
+    # Hash of the text; None and NaN (missing full_texts) get their own key, so they are not equal to the strings 'None' or 'nan'
+    def __text_hash(self, text):
+        if text is None or (isinstance(text, float) and math.isnan(text)):
+            key = b'missing'
+        else:
+            key = b'text:' + str(text).encode('utf-8')
+        return hashlib.blake2b(key, digest_size=16).hexdigest()
+
+    # Load the stored values of the passed hashes and note the access (LRU)
+    def __load(self, conn, namespace, hashes, decode):
+        found = dict()
+        now = time.time_ns()
+        for start in range(0, len(hashes), BATCH_SIZE):
+            batch = hashes[start:start + BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            rows = conn.execute(f'SELECT text_hash, value FROM entries WHERE namespace = ? AND text_hash IN ({placeholders})', (namespace, *batch)).fetchall()
+            for text_hash, value in rows:
+                found[text_hash] = decode(value)
+            if rows:
+                conn.execute(f'UPDATE entries SET last_access = ? WHERE namespace = ? AND text_hash IN ({placeholders})', (now, namespace, *batch))
+        return found
+
+    # Remove the least recently used values if the store is too big
+    def __evict(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        if count > self.max_entries:
+            conn.execute('DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY last_access LIMIT ?)', (count - self.max_entries,))
+            logging.info(f'{self.label}: {count - self.max_entries} least recently used values were removed.')
+
+    def __connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute('CREATE TABLE IF NOT EXISTS entries (text_hash TEXT NOT NULL, namespace TEXT NOT NULL, value BLOB NOT NULL, last_access INTEGER NOT NULL, PRIMARY KEY (text_hash, namespace))')
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        return conn
@@ -0,0 +1,56 @@
+# ## Token-Cache
+""" Script stores the tokens of preprocessed full_texts on disk (SQLite), so a full_text is tokenized only once for all steps
+(modeling, analysis inside and both finders of analysis outside) and all runs.
+Each token list is stored compressed (zlib) with the hash of its full_text and the version of the preprocessing (PREPRO_VERSION in preprocessing_data).
+If the preprocessing is changed, a new version is set and all texts are tokenized again.
+The cache holds max. max_entries texts, the texts that were not used for the longest time are removed first (LRU, see sqlite_lru).
+Settings (active, path, max_entries) in config.yaml: token_cache
+"""
+
+# ## Imports
+from services import sqlite_lru
+import zlib
+from pathlib import Path
+from typing import Callable
+import yaml
+
+# ## Open Configuration-File and set cache settings
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    cache_params = cfg['token_cache']
+    active = cache_params['active']
+    cache_path = Path(cache_params['path'])
+    max_entries = cache_params['max_entries']
+
+# ## Functions
+def cached_tokens(version: str, texts: list, compute: Callable[[list], list]) -> list:
+    """ Returns the tokens of each text. Tokens found in the cache are reused, only the missing texts are tokenized and stored.
+
+    Parameters
+    ----------
+    version: str
+        Version of the preprocessing that computes the tokens
+    texts: list
+        List with the full_texts (None or NaN if missing), used as key
+    compute: Callable[[list], list]
+        Function that gets a list of positions in texts and returns their token lists (None if a text could not be tokenized)
+
+    Returns
+    -------
+    tokens_lists: list
+        List with one token list per text (None if the text could not be tokenized), same order as texts """
+
+    if active != True:
+        return compute(list(range(len(texts))))
+    tokens_lists = sqlite_lru.LRUStore(cache_path, max_entries, 'Token-Cache').cached(version, texts, compute, (__encode, __decode))
+    # every position gets its own list (the lists are changed in later steps)
+    return [list(tokens_list) if tokens_list is not None else None for tokens_list in tokens_lists]
+
+# ## Private Functions
+
+# Codec of the token lists (compressed), texts which could not be tokenized are not stored
+def __encode(tokens_list):
+    return zlib.compress(' '.join(tokens_list).encode('utf-8')) if tokens_list is not None else None
+
+def __decode(blob):
+    return zlib.decompress(blob).decode('utf-8').split()
@@ -0,0 +1,53 @@
+# ## Vector operations
+""" Script contains the vector operations shared by the calculation (analysis inside) and the Doc2Vec search:
+    * normalize_rows: l2-normalization of dense vectors (rows without values stay 0)
+    * pairwise_rows: applies a row-wise function on the two rows of each pair, in blocks of BLOCK_SIZE pairs """
+
+# ## Imports
+import numpy as np
+from typing import Callable
+
+# Number of pairs computed at once (limits the memory of the row-aligned copies)
+BLOCK_SIZE = 100000
+
+# ## Functions
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """ Normalizes each row to length 1, rows with length 0 stay 0. The dtype of vectors is kept.
+
+    Parameters
+    ----------
+    vectors: np.ndarray
+        Dense matrix with one vector per row
+
+    Returns
+    -------
+    normalized: np.ndarray
+        New matrix with the normalized rows """
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+def pairwise_rows(matrix, idx_a: np.ndarray, idx_b: np.ndarray, row_function: Callable) -> np.ndarray:
+    """ Applies row_function on the rows of all pairs (a & b), in blocks of BLOCK_SIZE pairs.
+
+    Parameters
+    ----------
+    matrix: np.ndarray or sp.csr_matrix
+        Matrix with one row per distinct document
+    idx_a: np.ndarray
+        Row positions of the first job-ad of each pair
+    idx_b: np.ndarray
+        Row positions of the second job-ad of each pair
+    row_function: Callable
+        Gets the rows a and the rows b of one block and returns one value per pair
+
+    Returns
+    -------
+    values: np.ndarray
+        One value per pair (float64) """
+
+    values = np.empty(len(idx_a), dtype=np.float64)
+    for start in range(0, len(idx_a), BLOCK_SIZE):
+        stop = start + BLOCK_SIZE
+        values[start:stop] = row_function(matrix[idx_a[start:stop]], matrix[idx_b[start:stop]])
+    return values
@@ -0,0 +1,104 @@
+# ## Vector-Store
+""" Script stores the vectors of preprocessed texts on disk (SQLite), so unchanged texts do not need to be inferred or transformed again.
+Each vector is stored with the hash of its text and the fingerprint of the model (a new or retrained model gets a new fingerprint).
+    * dense vectors (Doc2Vec) are stored as float32 blobs
+    * sparse vectors (TF-IDF) are stored as one blob: indices (int32) followed by data (float64, so the scores are the same as without store)
+The store holds max. max_entries vectors, the vectors that were not used for the longest time are removed first (LRU, see sqlite_lru).
+Settings (active, path, max_entries) in config.yaml: vector_store
+"""
+
+# ## Imports
+from services import sqlite_lru
+import numpy as np
+import scipy.sparse as sp
+from pathlib import Path
+from typing import Callable
+import yaml
+
+# ## Open Configuration-File and set store settings
+with open(Path('config.yaml'), 'r') as yamlfile:
+    cfg = yaml.load(yamlfile, Loader=yaml.FullLoader)
+    store_params = cfg['vector_store']
+    active = store_params['active']
+    store_path = Path(store_params['path'])
+    max_entries = store_params['max_entries']
+
+# ## Functions
+def cached_dense(fingerprint: str, texts: list, compute: Callable[[list], np.ndarray]) -> np.ndarray:
+    """ Returns one dense vector per text. Vectors found in the store are reused, only the missing ones are computed and stored.
+
+    Parameters
+    ----------
+    fingerprint: str
+        Fingerprint of the model that computes the vectors
+    texts: list
+        List with the preprocessed texts (strings), used as key
+    compute: Callable[[list], np.ndarray]
+        Function that gets a list of positions in texts and returns their vectors (one row per position)
+
+    Returns
+    -------
+    vectors: np.ndarray
+        Matrix (float32) with one vector per text, same order as texts """
+
+    if active != True or not texts:
+        return np.asarray(compute(list(range(len(texts)))), dtype=np.float32)
+    rows = __store().cached(fingerprint, texts, lambda positions: __dense_rows(compute(positions)), (__encode_dense, __decode_dense))
+    return np.vstack(rows).astype(np.float32, copy=False)
+
+def cached_sparse(fingerprint: str, texts: list, compute: Callable[[list], sp.spmatrix], n_features: int) -> sp.csr_matrix:
+    """ Returns one sparse vector per text. Vectors found in the store are reused, only the missing ones are computed and stored.
+
+    Parameters
+    ----------
+    fingerprint: str
+        Fingerprint of the model that computes the vectors
+    texts: list
+        List with the preprocessed texts (strings), used as key
+    compute: Callable[[list], sp.spmatrix]
+        Function that gets a list of positions in texts and returns their vectors (one row per position)
+    n_features: int
+        Length of the vectors (e.g. size of the vocabulary)
+
+    Returns
+    -------
+    vectors: sp.csr_matrix
+        Sparse matrix with one vector per text, same order as texts """
+
+    if active != True:
+        return sp.csr_matrix(compute(list(range(len(texts)))))
+    rows = __store().cached(fingerprint, texts, lambda positions: __sparse_rows(compute(positions)), (__encode_sparse, __decode_sparse))
+    lengths = np.array([len(indices) for indices, _ in rows], dtype=np.int64)
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    indices = np.concatenate([indices for indices, _ in rows]) if rows else np.empty(0, dtype=np.int32)
+    data = np.concatenate([data for _, data in rows]) if rows else np.empty(0, dtype=np.float64)
+    return sp.csr_matrix((data, indices, indptr), shape=(len(rows), n_features))
+
+# ## Private Functions
+
+def __store():
+    return sqlite_lru.LRUStore(store_path, max_entries, 'Vector-Store')
+
+# Split computed vectors in rows
+def __dense_rows(vectors):
+    return list(np.asarray(vectors, dtype=np.float32))
+
+def __sparse_rows(vectors):
+    vectors = sp.csr_matrix(vectors)
+    vectors.sort_indices()
+    return [(vectors.indices[vectors.indptr[row]:vectors.indptr[row + 1]].astype(np.int32), vectors.data[vectors.indptr[row]:vectors.indptr[row + 1]].astype(np.float64)) for row in range(vectors.shape[0])]
+
+# Codec of the rows: dense as float32 blob, sparse as indices (int32) followed by data (float64, so the scores are the same as without store)
+def __encode_dense(row):
+    return row.tobytes()
+
+def __decode_dense(blob):
+    return np.frombuffer(blob, dtype=np.float32)
+
+def __encode_sparse(row):
+    indices, data = row
+    return indices.tobytes() + data.tobytes()
+
+def __decode_sparse(blob):
+    length = len(blob) // 12
+    return np.frombuffer(blob, dtype=np.int32, count=length), np.frombuffer(blob, dtype=np.float64, count=length, offset=4 * length)
@@ -0,0 +1,87 @@
+# *** Tests: batch formulas ***
+""" Run from the folder code (config.yaml): python -m pytest -q tests
+    The batch calculation (calculate_ratios.calc) has to give the same scores as the per-pair distributor. """
+
+# ## Imports
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from analysis.analysis_inside import calculate_ratios
+from analysis.analysis_inside import formulas
+from analysis.analysis_inside.formulas import formula_levenshtein
+from analysis.analysis_inside.formulas import formula_shinglingcosine
+from analysis.analysis_inside.formulas import formula_tfidfcosine
+from services import vector_store
+
+WORDS = ['pflegekraft', 'berlin', 'team', 'stelle', 'gehalt', 'teilzeit', 'vollzeit', 'erfahrung', 'kunden', 'verkauf', 'lager', 'fahrer']
+
+# ## Fixtures
+@pytest.fixture(autouse=True)
+def formula_settings(monkeypatch):
+    # no vector_store, no worker processes and no cutoff (the per-pair ratio has none)
+    monkeypatch.setattr(vector_store, 'active', False)
+    monkeypatch.setattr(formula_levenshtein, 'workers', 1)
+    monkeypatch.setattr(formula_levenshtein, 'cutoff', 0)
+
+@pytest.fixture
+def pairs():
+    # 40 pairs over 30 distinct documents (some unique_ids are in several pairs), the last row has no partner
+    generator = random.Random(1)
+    docs = [' '.join(generator.choices(WORDS, k=generator.randint(1, 25))) for _ in range(30)]
+    rows = list()
+    for pair in range(40):
+        for label, position in zip('ab', generator.sample(range(len(docs)), 2)):
+            rows.append({'pairing_label': f'{pair}{label}', 'unique_id': f'id-{position}', 'OneString': docs[position]})
+    rows.append({'pairing_label': '40a', 'unique_id': 'id-0', 'OneString': docs[0]})
+    return pd.DataFrame(rows)
+
+@pytest.fixture
+def similar_pairs():
+    # pairs with overlapping texts: b is a copy of a with some words replaced
+    generator = random.Random(2)
+    rows = list()
+    for pair in range(40):
+        words_a = generator.choices(WORDS, k=generator.randint(10, 40))
+        words_b = [word if generator.random() < 0.7 else generator.choice(WORDS) for word in words_a]
+        rows.append({'pairing_label': f'{pair}a', 'unique_id': f'id-{pair}a', 'OneString': ' '.join(words_a)})
+        rows.append({'pairing_label': f'{pair}b', 'unique_id': f'id-{pair}b', 'OneString': ' '.join(words_b)})
+    return pd.DataFrame(rows)
+
+# ## Functions
+def per_pair(df, step_key, jaccard=False):
+    scores = np.full(len(df), np.nan)
+    for row in range(0, len(df) - 1, 2):
+        scores[row] = scores[row + 1] = formulas.distributor(step_key, df['OneString'][row], df['OneString'][row + 1], jaccard)
+    return scores
+
+# ## Tests
+@pytest.mark.parametrize('step_key', ['countvec', 'levenshtein'])
+def test_batch_equals_per_pair(pairs, step_key):
+    np.testing.assert_allclose(calculate_ratios.calc(pairs, step_key, False), per_pair(pairs, step_key), atol=1e-12)
+
+def test_tfidf_batch_equals_per_pair(pairs, monkeypatch):
+    # model fitted on a part of the documents, so some tokens are not in the vocabulary
+    model = TfidfVectorizer(sublinear_tf=True).fit(pairs['OneString'][:20])
+    monkeypatch.setattr(formula_tfidfcosine, 'tfidf_model', model)
+    np.testing.assert_allclose(calculate_ratios.calc(pairs, 'tfidf', False), per_pair(pairs, 'tfidf'), atol=1e-12)
+
+def test_rows_without_pair_stay_empty(pairs):
+    scores = calculate_ratios.calc(pairs, 'countvec', False)
+    assert np.isnan(scores[-1]) and not np.isnan(scores[:-1]).any()
+
+@pytest.mark.parametrize('jaccard', [True, False])
+def test_shingling_batch_equals_per_pair(pairs, jaccard, monkeypatch):
+    monkeypatch.setattr(formula_shinglingcosine, 'minhash', False)
+    np.testing.assert_allclose(calculate_ratios.calc(pairs, 'shingling', jaccard), per_pair(pairs, 'shingling', jaccard), atol=1e-12)
+
+@pytest.mark.parametrize('jaccard', [True, False])
+def test_minhash_estimates_exact_scores(similar_pairs, jaccard, monkeypatch):
+    monkeypatch.setattr(formula_shinglingcosine, 'minhash', True)
+    monkeypatch.setattr(formula_shinglingcosine, 'num_perm', 256)
+    estimated = calculate_ratios.calc(similar_pairs, 'shingling', jaccard)
+    exact = per_pair(similar_pairs, 'shingling', jaccard)
+    # standard error of the estimate is max. 1 / (2 * sqrt(num_perm)) = 0.03
+    assert np.abs(estimated - exact).mean() < 0.03
+    assert np.abs(estimated - exact).max() < 0.12
@@ -0,0 +1,61 @@
+# *** Tests: combined preprocessing ***
+""" Run from the folder code (config.yaml): python -m pytest -q tests """
+
+# ## Imports
+import pandas as pd
+import pytest
+from gensim.utils import simple_preprocess
+import preprocessing
+from preprocessing import preprocessing_data
+from services import token_cache
+
+# ## Fixtures
+@pytest.fixture(autouse=True)
+def prepro_settings(monkeypatch):
+    # no stopword corpus, no worker processes and no token_cache needed for the tests
+    monkeypatch.setattr(preprocessing_data, 'stop_words', {'und', 'der', 'die'})
+    monkeypatch.setattr(preprocessing_data, 'workers', 1)
+    monkeypatch.setattr(token_cache, 'active', False)
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'unique_id': ['0000-0000-0000-0001', '0000-0000-0000-0002', '0000-0000-0000-0003'],
+                         'full_text': ['Pflegekraft und Team in Berlin!', 'Die Stelle: Pflegekraft, Berlin', '']})
+
+@pytest.fixture
+def tokenized(monkeypatch):
+    # counts the texts passed to simple_preprocess
+    calls = list()
+    def counting_preprocess(text, *args, **kwargs):
+        calls.append(text)
+        return simple_preprocess(text, *args, **kwargs)
+    monkeypatch.setattr(preprocessing_data, 'simple_preprocess', counting_preprocess)
+    return calls
+
+# ## Tests
+def test_single_view_tokenizes_again(df, tokenized):
+    for _ in range(3):
+        preprocessing.preprocess_data(df, 'doc2vec')
+    # nothing is kept between the calls, every call tokenizes all texts
+    assert len(tokenized) == 3 * len(df)
+
+def test_combined_table_is_tokenized_once(df, tokenized):
+    table = preprocessing.preprocess_data(df, 'combined')
+    preprocessing.preprocess_data(df, 'doc2vec', table)
+    preprocessing.preprocess_data(df, 'preprocessing', table)
+    assert len(tokenized) == len(df)
+
+def test_combined_views_are_independent(df):
+    table = preprocessing.preprocess_data(df, 'combined')
+    first = preprocessing.preprocess_data(df, 'doc2vec', table)
+    first[0].words.append('geändert')
+    assert preprocessing.preprocess_data(df, 'doc2vec', table) == preprocessing.preprocess_data(df, 'doc2vec')
+
+def test_combined_table_gives_both_outputs(df):
+    table = preprocessing.preprocess_data(df, 'combined')
+    assert preprocessing.preprocess_data(df, 'doc2vec', table) == preprocessing.preprocess_data(df, 'doc2vec')
+    assert preprocessing.preprocess_data(df, 'preprocessing', table) == preprocessing.preprocess_data(df, 'preprocessing')
+
+def test_combined_table_of_other_data_is_not_used(df):
+    table = preprocessing.preprocess_data(df.iloc[:2], 'combined')
+    assert preprocessing.preprocess_data(df, 'preprocessing', table) == preprocessing.preprocess_data(df, 'preprocessing')
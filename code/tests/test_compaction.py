@@ -0,0 +1,73 @@
+# *** Tests: Doc2Vec compaction ***
+""" Run from the folder code (config.yaml): python -m pytest -q tests
+    Round-trip of the compaction: the saved model is quantized, restore gives the vectors back within the precision of the dtype.
+    The model is a stand-in with the attributes of a gensim 3.8 Doc2Vec model (no training needed). """
+
+# ## Imports
+import copy
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from modeling import doc2vec
+from modeling import registry
+from modeling.doc2vec import ann_index
+from modeling.doc2vec import compaction
+
+COUNTS = [5, 1, 3, 2, 7, 1]
+
+# docvecs of the stand-in (len gives the number of documents like gensim's Doc2VecKeyedVectors)
+class DocVecs(SimpleNamespace):
+    def __len__(self):
+        return len(self.vectors_docs)
+
+# ## Fixtures
+@pytest.fixture
+def model():
+    random_state = np.random.RandomState(5)
+    words = [f'wort{i}' for i in range(len(COUNTS))]
+    docvecs = DocVecs(vectors_docs=random_state.randn(20, 8).astype(np.float32), vectors_docs_norm=None)
+    wv = SimpleNamespace(vectors=random_state.randn(len(words), 8).astype(np.float32), vectors_norm=None, index2word=list(words),
+                         vocab={word: SimpleNamespace(count=count, index=index) for index, (word, count) in enumerate(zip(words, COUNTS))})
+    trainables = SimpleNamespace(syn1neg=random_state.randn(len(words), 8).astype(np.float32), vectors_lockf=np.ones(len(words), dtype=np.float32),
+                                 vectors_docs_lockf=np.ones(20, dtype=np.float32))
+    vocabulary = SimpleNamespace(make_cum_table=lambda wv: None)
+    return SimpleNamespace(docvecs=docvecs, wv=wv, trainables=trainables, vocabulary=vocabulary, negative=5, hs=0)
+
+@pytest.fixture
+def compacted(model, monkeypatch):
+    # the saved model is copied (quantized state), nothing is written
+    saved = list()
+    original = copy.deepcopy(model)
+    monkeypatch.setattr(doc2vec, 'load_model', lambda name: model)
+    monkeypatch.setattr(registry, 'fingerprint', lambda name: 'source')
+    monkeypatch.setattr(registry, 'save', lambda model, name, metadata, versioned=False: saved.append(copy.deepcopy(model)))
+    monkeypatch.setattr(ann_index, 'build_after_training', False)
+    monkeypatch.setattr(compaction, 'min_count', 2)
+    return original, model, saved
+
+# ## Tests
+@pytest.mark.parametrize('dtype, tolerance', [('float16', 1e-3), ('int8', 1 / 127)])
+def test_round_trip(compacted, dtype, tolerance, monkeypatch):
+    monkeypatch.setattr(compaction, 'dtype', dtype)
+    original, model, saved = compacted
+    compaction.compact_model()
+    stored, = saved
+
+    # the saved model holds the quantized vectors, only words with min_count occurrences
+    assert stored.docvecs.vectors_docs.dtype == np.dtype(dtype)
+    assert stored.wv.vectors.dtype == np.dtype(dtype)
+    kept = [index for index, count in enumerate(COUNTS) if count >= 2]
+    assert stored.wv.index2word == [original.wv.index2word[index] for index in kept]
+    assert [stored.wv.vocab[word].index for word in stored.wv.index2word] == list(range(len(kept)))
+
+    # loaded (restore) and in-process model give the same vectors, close to the original ones
+    loaded = compaction.restore(stored)
+    for restored in (loaded, model):
+        assert restored.docvecs.vectors_docs.dtype == np.float16
+        assert restored.wv.vectors.dtype == np.float32 and restored.trainables.syn1neg.dtype == np.float32
+        for values, source in ((restored.docvecs.vectors_docs, original.docvecs.vectors_docs), (restored.wv.vectors, original.wv.vectors[kept]),
+                               (restored.trainables.syn1neg, original.trainables.syn1neg[kept])):
+            scale = np.abs(source).max(axis=1, keepdims=True)
+            assert np.all(np.abs(values.astype(np.float32) - source) <= tolerance * scale + 1e-3 * np.abs(source))
+    np.testing.assert_array_equal(loaded.docvecs.vectors_docs, model.docvecs.vectors_docs)
+    np.testing.assert_array_equal(loaded.wv.vectors, model.wv.vectors)
@@ -0,0 +1,48 @@
+# *** Tests: TF-IDF finder ***
+""" Run from the folder code (config.yaml): python -m pytest -q tests
+    The blockwise sparse top-k has to give the same most similar unique_ids as the full linear_kernel with a stable sort. """
+
+# ## Imports
+import random
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+from analysis.analysis_outside.tfidf_finder import tfidf_finder
+from modeling import registry
+from services import vector_store
+
+WORDS = ['pflegekraft', 'berlin', 'team', 'stelle', 'gehalt', 'teilzeit', 'vollzeit', 'erfahrung', 'kunden', 'verkauf', 'lager', 'fahrer']
+
+# ## Fixtures
+@pytest.fixture
+def data():
+    generator = random.Random(3)
+    traindata = {f'train-{i}': ' '.join(generator.choices(WORDS, k=generator.randint(1, 15))) for i in range(60)}
+    # equal texts (equal scores) and texts without any word of the model (only scores 0)
+    traindata['train-60'] = traindata['train-61'] = traindata['train-62'] = 'pflegekraft berlin'
+    testdata = {f'test-{i}': ' '.join(generator.choices(WORDS, k=generator.randint(1, 15))) for i in range(25)}
+    testdata['test-25'] = 'pflegekraft berlin'
+    testdata['test-26'] = 'unbekannt wort'
+    return {'test_table': testdata}, {'train_table': traindata}
+
+@pytest.fixture
+def model(data, monkeypatch):
+    tfidf_model = TfidfVectorizer(sublinear_tf=True).fit(data[1]['train_table'].values())
+    monkeypatch.setattr(registry, 'get', lambda name: tfidf_model)
+    monkeypatch.setattr(vector_store, 'active', False)
+    return tfidf_model
+
+# ## Tests
+@pytest.mark.parametrize('block_size', [1, 7, 1000])
+def test_blocks_equal_full_kernel(data, model, block_size, monkeypatch):
+    monkeypatch.setattr(tfidf_finder, 'block_size', block_size)
+    testdata, traindata = data
+    sims_dict, testdata_sim_ids, traindata_sim_ids = tfidf_finder.most_similar(testdata, traindata)
+
+    train_ids = list(traindata['train_table'])
+    cosines = linear_kernel(model.transform(testdata['test_table'].values()), model.transform(traindata['train_table'].values()))
+    expected = {uid: [train_ids[position] for position, _ in sorted(enumerate(row), key=lambda item: item[1], reverse=True)[:tfidf_finder.TOPN]]
+                for uid, row in zip(testdata['test_table'], cosines)}
+    assert sims_dict == expected
+    assert testdata_sim_ids == list(testdata['test_table'])
+    assert len(traindata_sim_ids) == tfidf_finder.TOPN * len(testdata['test_table'])
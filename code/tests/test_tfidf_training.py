@@ -0,0 +1,55 @@
+# *** Tests: TF-IDF training ***
+""" Run from the folder code (config.yaml): python -m pytest -q tests
+    The streaming fit (chunk by chunk) has to give the same model as the fit with all traindata at once. """
+
+# ## Imports
+import random
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from modeling import registry
+from modeling.tfidf.training import tfidf_training
+
+WORDS = ['pflegekraft', 'berlin', 'team', 'stelle', 'gehalt', 'teilzeit', 'vollzeit', 'erfahrung', 'kunden', 'verkauf', 'lager', 'fahrer']
+
+# ## Fixtures
+@pytest.fixture
+def saved_models(monkeypatch):
+    # the models are kept instead of saved
+    models = list()
+    monkeypatch.setattr(registry, 'save', lambda model, name, metadata, versioned=False: models.append(model))
+    return models
+
+@pytest.fixture
+def chunks():
+    generator = random.Random(4)
+    texts = [' '.join(generator.choices(WORDS, k=generator.randint(1, 20))) for _ in range(90)]
+    # chunks of different sizes, one chunk without any words
+    chunks = [texts[:40], texts[40:41], ['x'], texts[41:]]
+    return [{f'id-{number}-{position}': text for position, text in enumerate(chunk)} for number, chunk in enumerate(chunks)]
+
+# ## Tests
+@pytest.mark.parametrize('sublinear_tf', [True, False])
+def test_stream_equals_fit(chunks, saved_models, sublinear_tf, monkeypatch):
+    monkeypatch.setitem(tfidf_training.params, 'sublinear_tf', sublinear_tf)
+    monkeypatch.setitem(tfidf_training.params, 'hashed', False)
+    tfidf_training.train_stream(iter(chunks))
+    streamed, = saved_models
+
+    texts = [text for chunk in chunks for text in chunk.values()]
+    fitted = TfidfVectorizer(sublinear_tf=sublinear_tf).fit(texts)
+    assert streamed.vocabulary_ == fitted.vocabulary_
+    np.testing.assert_allclose(streamed.idf_, fitted.idf_)
+    np.testing.assert_allclose(streamed.transform(texts).toarray(), fitted.transform(texts).toarray())
+
+def test_hashed_stream_equals_hashed_fit(chunks, saved_models, monkeypatch):
+    monkeypatch.setitem(tfidf_training.params, 'hashed', True)
+    monkeypatch.setitem(tfidf_training.params, 'n_features', 2 ** 10)
+    tfidf_training.train_stream(iter(chunks))
+    streamed, = saved_models
+
+    texts = [text for chunk in chunks for text in chunk.values()]
+    hasher = HashingVectorizer(n_features=2 ** 10, alternate_sign=False, norm=None)
+    fitted = TfidfTransformer(sublinear_tf=tfidf_training.params['sublinear_tf']).fit(hasher.transform(texts))
+    np.testing.assert_allclose(streamed.idf_, fitted.idf_)
+    np.testing.assert_allclose(streamed.transform(texts).toarray(), fitted.transform(hasher.transform(texts)).toarray())